@@ -1,16 +1,33 @@
 # adapters/brother_toner_web.py
 from __future__ import annotations
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 from requests.exceptions import Timeout, RequestException
+from adapters.polling import OnError, log_failure, poll_many
+
+try:
+    from lxml import html as lxhtml  # type: ignore
+    _BS4_PARSER = "lxml"
+except ImportError:
+    lxhtml = None
+    _BS4_PARSER = "html.parser"
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (+toner-finder)"}
 COLOR_PRETTY = {"BK": "Black", "K": "Black", "C": "Cyan", "M": "Magenta", "Y": "Yellow"}
+# shared keep-alive pool: polling the fleet reuses connections instead of one per call
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=64))
+# only the ink-level tables are ever read; don't build the rest of the page
+_LEVEL_STRAINER = SoupStrainer("table", attrs={"id": ["inkLevel", "inkLevelMono"]})
+_NON_ALPHA_RE = re.compile(r"[^A-Za-z]")
+_DIGITS_RE = re.compile(r"\d+")
+_HEIGHT_RE = re.compile(r"height\s*:\s*(\d+)", re.I)
 
 def _normalize_label(text: str) -> Optional[str]:
-    t = re.sub(r"[^A-Za-z]", "", (text or "")).upper()
+    t = _NON_ALPHA_RE.sub("", (text or "")).upper()
     if not t:
         return None
     if t in {"BK", "K", "BLK", "BLACK"}:
@@ -23,39 +40,36 @@ def _normalize_label(text: str) -> Optional[str]:
         return "Y"
     return t
 
-def _clamp_pct(v: Optional[int]) -> Optional[int]:
+def _pct_with_symbol(v: Optional[int]) -> Optional[str]:
     if v is None:
         return None
     try:
-        return max(0, min(int(v), 100))
+        return f"{max(0, min(int(v), 100))}%"
     except Exception:
         return None
 
-def _pct_with_symbol(v: Optional[int]) -> Optional[str]:
-    vv = _clamp_pct(v)
-    return None if vv is None else f"{vv}%"
-
 def _extract_img_height(td) -> Optional[int]:
-    img = td.find("img")
-    if img:
+    # td is an lxml element when lxml is installed, else a bs4 Tag; both expose .get(attr)
+    img = td.find(".//img") if lxhtml is not None else td.find("img")
+    if img is not None:
         h = img.get("height")
         if h:
-            m = re.search(r"\d+", str(h))
+            m = _DIGITS_RE.search(str(h))
             if m:
                 return int(m.group(0))
         style = img.get("style")
         if style:
-            m = re.search(r"height\s*:\s*(\d+)", style, re.I)
+            m = _HEIGHT_RE.search(style)
             if m:
                 return int(m.group(1))
     h = td.get("height")
     if h:
-        m = re.search(r"\d+", str(h))
+        m = _DIGITS_RE.search(str(h))
         if m:
             return int(m.group(0))
     style = td.get("style")
     if style:
-        m = re.search(r"height\s*:\s*(\d+)", style, re.I)
+        m = _HEIGHT_RE.search(style)
         if m:
             return int(m.group(1))
     return None
@@ -66,30 +80,54 @@ def _find_level_table(soup: BeautifulSoup):
         return table
     return soup.find("table", id="inkLevelMono")
 
+def _level_cells_lxml(text: str) -> Tuple[list, List[str]]:
+    try:
+        doc = lxhtml.fromstring(text)
+    except Exception:
+        return [], []
+    tables = doc.xpath('//table[@id="inkLevel"]') or doc.xpath('//table[@id="inkLevelMono"]')
+    if not tables:
+        return [], []
+    tbody = tables[0].find(".//tbody")
+    rows = (tbody if tbody is not None else tables[0]).xpath(".//tr")
+    if len(rows) < 3:
+        return [], []
+    return rows[1].xpath("./td"), [th.text_content().strip() for th in rows[2].xpath("./th")]
+
+def _level_cells_bs4(text: str) -> Tuple[list, List[str]]:
+    soup = BeautifulSoup(text, _BS4_PARSER, parse_only=_LEVEL_STRAINER)
+    table = _find_level_table(soup)
+    if not table:
+        return [], []
+    tbody = table.find("tbody") or table
+    rows = tbody.find_all("tr")
+    if len(rows) < 3:
+        return [], []
+    return (rows[1].find_all("td", recursive=False),
+            [th.get_text(strip=True) for th in rows[2].find_all("th", recursive=False)])
+
 def get_brother_toner(ip: str, *, timeout: float) -> Tuple[str, List[Dict[str, Optional[str]]]]:
     url = f"http://{ip}/general/status.html"
     try:
-        r = requests.get(url, headers=HEADERS, timeout=timeout)
+        r = _SESSION.get(url, headers=HEADERS, timeout=timeout)
         r.raise_for_status()
     except Timeout:
         return "offline", []
     except RequestException:
         return "offline", []
-    soup = BeautifulSoup(r.text, "html.parser")
-    table = _find_level_table(soup)
-    if not table:
-        return "online", []
-    tbody = table.find("tbody") or table
-    rows = tbody.find_all("tr")
-    if len(rows) < 3:
-        return "online", []
-    level_tds = rows[1].find_all("td", recursive=False)
-    label_ths = rows[2].find_all("th", recursive=False)
+    level_tds, label_texts = (_level_cells_lxml if lxhtml is not None else _level_cells_bs4)(r.text)
     heights = [_extract_img_height(td) for td in level_tds]
-    labels = [_normalize_label(th.get_text(strip=True)) for th in label_ths]
+    labels = [_normalize_label(t) for t in label_texts]
     labels = [x for x in labels if x]
-    cartridges: List[Dict[str, Optional[str]]] = []
-    for code, val in zip(labels, heights):
-        pretty = COLOR_PRETTY.get(code, code)
-        cartridges.append({"cartridge": pretty, "remaining_percent": _pct_with_symbol(val)})
+    cp_get, pct = COLOR_PRETTY.get, _pct_with_symbol
+    cartridges: List[Dict[str, Optional[str]]] = [
+        {"cartridge": cp_get(code, code), "remaining_percent": pct(val)}
+        for code, val in zip(labels, heights)
+    ]
     return "online", cartridges
+
+def get_brother_toner_batch(ips: Iterable[str], *, timeout: float, on_error: Optional[OnError] = None,
+                            max_workers: int = 32) -> Dict[str, Tuple[str, List[Dict[str, Optional[str]]]]]:
+    """Poll many printers concurrently; a failed IP maps to on_error(ip, exc), by default ("offline", [])."""
+    return poll_many(get_brother_toner, ips, timeout=timeout, max_workers=max_workers,
+                     on_error=on_error or log_failure(lambda: ("offline", [])))
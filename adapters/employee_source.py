@@ -8,35 +8,40 @@ def read_employees_xlsx(path: str | Path) -> List[Dict[str, Any]]:
     if not p.exists():
         return []
     wb = load_workbook(filename=str(p), data_only=True, read_only=True)
-    ws = wb.worksheets[0]
-    rows = ws.iter_rows(values_only=True)
     try:
-        header = next(rows)
-    except StopIteration:
-        return []
-    headers = [str(h or "").strip().lower() for h in header]
-    def idx(opts: List[str]) -> int | None:
-        for n in opts:
-            low = n.lower()
-            if low in headers:
-                return headers.index(low)
-        return None
-    id_i = idx(["id","branch id","מספר סניף","מס'"])
-    name_i = idx(["name","contact","contacts name","manager","שם איש קשר","שם פרטי"])
-    phone_i = idx(["phone","contacts phone","טלפון","טלפון נייד"])
-    items: List[Dict[str, Any]] = []
-    for row in rows:
-        vals = list(row) if row else []
-        def at(i):
-            return None if i is None or i >= len(vals) else vals[i]
-        rid = at(id_i)
-        nm = at(name_i)
-        ph = at(phone_i)
-        if rid is None and nm is None and ph is None:
-            continue
-        items.append({
-            "id": "" if rid is None else str(rid).strip(),
-            "name": "" if nm is None else str(nm).strip(),
-            "phone": "" if ph is None else str(ph).strip(),
-        })
-    return items
+        ws = wb.worksheets[0]
+        try:
+            header = next(ws.iter_rows(max_row=1, values_only=True))
+        except StopIteration:
+            return []
+        lookup: Dict[str, int] = {}
+        for i, h in enumerate(header):
+            lookup.setdefault(str(h or "").strip().lower(), i)
+        def idx(opts: List[str]) -> int | None:
+            return next((lookup[n.lower()] for n in opts if n.lower() in lookup), None)
+        id_i = idx(["id","branch id","מספר סניף","מס'"])
+        name_i = idx(["name","contact","contacts name","manager","שם איש קשר","שם פרטי"])
+        phone_i = idx(["phone","contacts phone","טלפון","טלפון נייד"])
+        wanted = [i for i in (id_i, name_i, phone_i) if i is not None]
+        if not wanted:
+            return []
+        items: List[Dict[str, Any]] = []
+        # stop each row at the last column we need
+        for row in ws.iter_rows(min_row=2, max_col=max(wanted) + 1, values_only=True):
+            if not row:
+                continue
+            n = len(row)
+            rid = row[id_i] if id_i is not None and id_i < n else None
+            nm = row[name_i] if name_i is not None and name_i < n else None
+            ph = row[phone_i] if phone_i is not None and phone_i < n else None
+            if rid is None and nm is None and ph is None:
+                continue
+            items.append({
+                "id": "" if rid is None else str(rid).strip(),
+                "name": "" if nm is None else str(nm).strip(),
+                "phone": "" if ph is None else str(ph).strip(),
+            })
+        return items
+    finally:
+        # read-only workbooks keep the zip/XML streams open until closed
+        wb.close()
@@ -1,15 +1,29 @@
 # adapters/ews_alerts.py
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Tuple
-import json, re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json, os, re
 import requests
 import urllib3
 from bs4 import BeautifulSoup
-from adapters.http_legacy import make_legacy_session
+from adapters.http_legacy import split_timeout, thread_legacy_session
+from adapters.polling import OnError, log_failure, poll_many
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+try:
+    import lxml  # type: ignore  # noqa: F401
+    _BS4_PARSER = "lxml"
+except ImportError:
+    _BS4_PARSER = "html.parser"
+
 CODE_RE = re.compile(r"\b[A-Z]\d-\d{3,5}\b")
+_DESC_KEY_RE = re.compile(r"desc|message|detail|reason")
+_JSON_REPAIR_RE = re.compile(r'([{\[,]\s*)([A-Za-z_][A-Za-z0-9_]*)(\s*):')
 
 def _triage_three(sev: Optional[str]) -> str:
     if sev is None:
@@ -32,6 +46,11 @@ def _triage_three(sev: Optional[str]) -> str:
     return "informational"
 
 def _parse_json_text(text: str) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except Exception:
+            pass
     try:
         return json.loads(text)
     except Exception:
@@ -41,45 +60,49 @@ def _parse_json_text(text: str) -> Any:
         return json5.loads(text)
     except Exception:
         pass
-    fixed = re.sub(r'([{\[,]\s*)([A-Za-z_][A-Za-z0-9_]*)(\s*):', r'\1"\2"\3:', text)
+    fixed = _JSON_REPAIR_RE.sub(r'\1"\2"\3:', text)
     return json.loads(fixed)
 
+def _dedup_alerts(alerts: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    # first alert per (severity, code, description) wins, order kept
+    uniq: Dict[Tuple[str, str, str], Dict[str, str]] = {}
+    for a in alerts:
+        uniq.setdefault((a["severity"], a["status_code"], a["description"]), a)
+    return list(uniq.values())
+
 def _extract_alerts_from_json(obj: Any) -> List[Dict[str, str]]:
     out: List[Dict[str, str]] = []
-    def walk(v: Any):
+    # explicit pre-order stack; children pushed reversed to keep document order
+    stack: List[Any] = [obj]
+    while stack:
+        v = stack.pop()
         if isinstance(v, dict):
             kl = {k.lower(): k for k in v.keys()}
             cand: Dict[str, str] = {}
-            for k in list(kl.keys()):
-                if "severity" in k and isinstance(v[kl[k]], (str, int)):
-                    cand["severity"] = str(v[kl[k]]).strip()
-                if ("code" in k or "statuscode" in k or "errorcode" in k) and isinstance(v[kl[k]], (str, int, str)):
-                    cand["status_code"] = str(v[kl[k]]).strip()
-                if any(x in k for x in ["desc", "message", "detail", "reason"]) and isinstance(v[kl[k]], str):
-                    cand["description"] = v[kl[k]].strip()
+            for k, orig in kl.items():
+                val = v[orig]
+                if "severity" in k and isinstance(val, (str, int)):
+                    cand["severity"] = str(val).strip()
+                if "code" in k and isinstance(val, (str, int)):
+                    cand["status_code"] = str(val).strip()
+                if _DESC_KEY_RE.search(k) and isinstance(val, str):
+                    cand["description"] = val.strip()
             if cand.get("description") or cand.get("status_code"):
                 if "severity" not in cand:
                     cand["severity"] = "unknown"
                 out.append({"severity": cand["severity"], "status_code": cand.get("status_code",""), "description": cand.get("description","")})
-            for vv in v.values():
-                walk(vv)
+            stack.extend(reversed(list(v.values())))
         elif isinstance(v, list):
-            for it in v:
-                walk(it)
-        elif isinstance(v, str):
+            stack.extend(reversed(v))
+        elif isinstance(v, str) and "-" in v:
+            # every status code has a hyphen; skip the regex for the rest
             m = CODE_RE.search(v)
             if m:
                 out.append({"severity": "unknown", "status_code": m.group(0), "description": v.strip()})
-    walk(obj)
-    uniq, seen = [], set()
-    for a in out:
-        key = (a.get("severity",""), a.get("status_code",""), a.get("description",""))
-        if key not in seen:
-            uniq.append(a); seen.add(key)
-    return uniq
+    return _dedup_alerts(out)
 
 def _extract_alerts_from_html(html: str) -> List[Dict[str, str]]:
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, _BS4_PARSER)
     alerts: List[Dict[str, str]] = []
     rows = soup.select("div.x-grid3-body div.x-grid3-row") or soup.select("tr")
     for row in rows:
@@ -91,7 +114,7 @@ def _extract_alerts_from_html(html: str) -> List[Dict[str, str]]:
             continue
         desc = max(cells, key=len).strip()
         code = ""
-        m = CODE_RE.search(desc)
+        m = CODE_RE.search(desc) if "-" in desc else None
         if m:
             code = m.group(0)
             if desc.startswith(code):
@@ -108,16 +131,23 @@ def _extract_alerts_from_html(html: str) -> List[Dict[str, str]]:
             sev = "unknown"
         if desc or code:
             alerts.append({"severity": sev, "status_code": code, "description": desc})
-    uniq, seen = [], set()
-    for a in alerts:
-        key = (a.get("severity",""), a.get("status_code",""), a.get("description",""))
-        if key not in seen:
-            uniq.append(a); seen.add(key)
-    return uniq
+    return _dedup_alerts(alerts)
 
 def _load_code_catalog(path: Optional[str]) -> Dict[str, Dict[str, str]]:
+    # keyed on mtime: the catalog is reparsed only when the file changes
     if not path:
         return {}
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    return _load_code_catalog_cached(path, mtime)
+
+@lru_cache(maxsize=8)
+def _load_code_catalog_cached(path: str, mtime: float) -> Dict[str, Dict[str, str]]:
+    return _load_code_catalog_impl(path)
+
+def _load_code_catalog_impl(path: str) -> Dict[str, Dict[str, str]]:
     try:
         with open(path, "r", encoding="utf-8") as f:
             raw = json.load(f)
@@ -209,7 +239,7 @@ def _normalize_problem_and_severity(problem: str) -> Tuple[str, Optional[str]]:
 
 def _session_probe_get(s: requests.Session, url: str, timeout: float) -> Optional[str]:
     try:
-        r = s.get(url, verify=False, timeout=timeout)
+        r = s.get(url, verify=False, timeout=split_timeout(timeout))
     except Exception:
         return None
     if r.status_code != 200 or not r.text:
@@ -221,12 +251,15 @@ def _session_probe_get(s: requests.Session, url: str, timeout: float) -> Optiona
     return r.text
 
 def _fetch_ews_alerts(ip: str, timeout: float) -> List[Dict[str, str]]:
-    s = make_legacy_session(timeout=timeout)
+    s = thread_legacy_session(timeout)
     out: List[Dict[str, str]] = []
     for scheme in ("https", "http"):
         base = f"{scheme}://{ip}"
         try:
-            s.get(f"{base}/sws/index.html", verify=False, timeout=timeout)
+            s.get(f"{base}/sws/index.html", verify=False, timeout=split_timeout(timeout))
+        except requests.exceptions.ConnectTimeout:
+            # no TCP answer at all: every remaining path and scheme would stall the same way
+            return out
         except Exception:
             pass
         for path in (
@@ -245,7 +278,7 @@ def _fetch_ews_alerts(ip: str, timeout: float) -> List[Dict[str, str]]:
                 except Exception:
                     pass
         try:
-            r = s.get(f"{base}/sws/app/information/activealert/activealert.html", verify=False, timeout=timeout)
+            r = s.get(f"{base}/sws/app/information/activealert/activealert.html", verify=False, timeout=split_timeout(timeout))
             if r.status_code == 200:
                 if not r.encoding:
                     r.encoding = r.apparent_encoding
@@ -259,21 +292,21 @@ def _fetch_ews_alerts(ip: str, timeout: float) -> List[Dict[str, str]]:
 def _pick_alert(alerts: List[Dict[str, str]], catalog: Dict[str, Dict[str, str]]) -> Tuple[str, str, str]:
     if not alerts:
         return ("", "", "informational")
+    catalog_get = catalog.get
     def rank(a: Dict[str, str]) -> Tuple[int, int]:
         r = _severity_rank(a.get("severity",""))
         if r == 0:
             code = a.get("status_code","")
-            if code and code in catalog:
-                r = _catalog_status_to_rank(catalog[code].get("status"))
+            if code and (entry := catalog_get(code)) is not None:
+                r = _catalog_status_to_rank(entry.get("status"))
         has_code = 1 if a.get("status_code") else 0
         return (r, has_code)
-    pool = alerts[:]
-    pool.sort(key=rank, reverse=True)
-    top = pool[0]
+    # max() keeps the first of equal ranks, same as the stable reverse sort did
+    top = max(alerts, key=rank)
     code = top.get("status_code","")
     desc = top.get("description","").strip()
-    if not code:
-        m = CODE_RE.search(desc or "")
+    if not code and "-" in desc:
+        m = CODE_RE.search(desc)
         if m:
             code = m.group(0)
     base_sev = None
@@ -291,3 +324,10 @@ def get_ews_problem_and_severity(ip: str, *, timeout: float, catalog_path: Optio
     label, forced = _normalize_problem_and_severity(label)
     sev = forced or (_triage_three(sev_from_catalog) if sev_from_catalog else base_sev)
     return label or "Ready", sev or "informational"
+
+def get_ews_problem_and_severity_batch(ips: Iterable[str], *, timeout: float, catalog_path: Optional[str],
+                                       on_error: Optional[OnError] = None,
+                                       max_workers: int = 32) -> Dict[str, Tuple[str, str]]:
+    """Fetch many printers concurrently; a failed IP maps to on_error(ip, exc), by default ("Offline", "critical")."""
+    return poll_many(get_ews_problem_and_severity, ips, timeout=timeout, catalog_path=catalog_path,
+                     max_workers=max_workers, on_error=on_error or log_failure(lambda: ("Offline", "critical")))
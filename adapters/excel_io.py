@@ -2,7 +2,7 @@
 from __future__ import annotations
 from pathlib import Path
 import shutil
-from datetime import datetime
+import time
 import openpyxl
 
 def resolve_xlsm(path_like: str | Path) -> Path:
@@ -29,7 +29,9 @@ def save_workbook(wb, path: Path) -> None:
 
 def backup_workbook(wb, logs_dir: Path) -> Path:
     logs_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y-%m-%d %H-%M-%S")
+    # millisecond suffix so two backups in the same second don't overwrite each other
+    ns = time.time_ns()
+    ts = time.strftime("%Y-%m-%d %H-%M-%S", time.localtime(ns // 10**9)) + f"-{(ns // 10**6) % 1000:03d}"
     target = logs_dir / f"{ts}.xlsm"
     wb.save(str(target))
     return target
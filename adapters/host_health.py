@@ -0,0 +1,44 @@
+# adapters/host_health.py
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+DOWN_TTL = float(os.getenv("PRINTER_HOST_DOWN_TTL", "30"))
+
+# scope "*" = host unreachable for everyone; "snmp"/"http" = only that protocol timed out
+ANY = "*"
+
+_lock = threading.Lock()
+_down: Dict[Tuple[str, str], Tuple[float, str]] = {}
+
+
+def mark_down(host: str, reason: str = "", *, scope: str = ANY, ttl: Optional[float] = None) -> None:
+    expires = time.monotonic() + (DOWN_TTL if ttl is None else ttl)
+    with _lock:
+        _down[(host, scope)] = (expires, reason)
+
+
+def mark_up(host: str, scope: str = ANY) -> None:
+    # the host answered on `scope`: it is reachable, other protocols' timeouts still stand
+    if not _down:
+        return
+    with _lock:
+        _down.pop((host, ANY), None)
+        _down.pop((host, scope), None)
+
+
+def is_down(host: str, scope: str = ANY) -> bool:
+    if not _down:
+        return False
+    now = time.monotonic()
+    with _lock:
+        for key in ((host, ANY), (host, scope)):
+            entry = _down.get(key)
+            if entry is None:
+                continue
+            if entry[0] > now:
+                return True
+            del _down[key]
+    return False
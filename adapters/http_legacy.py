@@ -1,24 +1,43 @@
 # adapters/http_legacy.py
 from __future__ import annotations
 import ssl
+import threading
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.poolmanager import PoolManager
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
+
+CONNECT_TIMEOUT = 3.0
+
+
+def split_timeout(timeout: float) -> Tuple[float, float]:
+    """(connect, read) pair so unreachable hosts fail fast but slow EWS pages still load."""
+    return (min(CONNECT_TIMEOUT, timeout), timeout)
 
 
 class TLSLegacyAdapter(HTTPAdapter):
+    # SSLContext setup is costly; adapters with the same version range share one
+    _SHARED_CTX: Dict[Tuple[Any, Any], ssl.SSLContext] = {}
+
     def __init__(self, min_version=None, max_version=None, **kwargs):
         self._min_version = min_version
         self._max_version = max_version
         super().__init__(**kwargs)
 
+    def _ssl_context(self) -> ssl.SSLContext:
+        key = (self._min_version, self._max_version)
+        ctx = self._SHARED_CTX.get(key)
+        if ctx is None:
+            ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            ctx.check_hostname = False
+            if hasattr(ctx, "minimum_version") and hasattr(ssl, "TLSVersion"):
+                ctx.minimum_version = self._min_version or ssl.TLSVersion.TLSv1
+                ctx.maximum_version = self._max_version or ssl.TLSVersion.TLSv1_2
+            self._SHARED_CTX[key] = ctx
+        return ctx
+
     def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
-        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-        ctx.check_hostname = False
-        if hasattr(ctx, "minimum_version") and hasattr(ssl, "TLSVersion"):
-            ctx.minimum_version = self._min_version or ssl.TLSVersion.TLSv1
-            ctx.maximum_version = self._max_version or ssl.TLSVersion.TLSv1_2
+        ctx = self._ssl_context()
         self.poolmanager = PoolManager(
             num_pools=connections,
             maxsize=maxsize,
@@ -28,9 +47,21 @@ class TLSLegacyAdapter(HTTPAdapter):
         )
 
 
-def make_legacy_session(timeout: float = 4.0) -> requests.Session:
+def make_legacy_session(timeout: float = 4.0, pool_size: int = 10) -> requests.Session:
     s = requests.Session()
-    s.mount("https://", TLSLegacyAdapter())
-    s.mount("http://", TLSLegacyAdapter())
+    s.mount("https://", TLSLegacyAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+    s.mount("http://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+    s.headers["Connection"] = "keep-alive"
     s.timeout = timeout
     return s
+
+
+_local = threading.local()
+
+
+def thread_legacy_session(timeout: float = 4.0) -> requests.Session:
+    """One keep-alive legacy session per worker thread, reused across printers."""
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = make_legacy_session(timeout=timeout)
+    return s
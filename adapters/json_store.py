@@ -2,18 +2,47 @@
 from __future__ import annotations
 from pathlib import Path
 import json
+import os
 from typing import Any
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+def atomic_write_bytes(path: Path, payload: bytes) -> None:
+    """Write via a fsynced temp file + rename, so readers never see a torn file."""
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp.replace(path)
+    # make the rename itself durable (POSIX only; Windows has no dir fds)
+    if hasattr(os, "O_DIRECTORY"):
+        dfd = os.open(str(path.parent), os.O_DIRECTORY)
+        try:
+            os.fsync(dfd)
+        finally:
+            os.close(dfd)
+
 class JsonStore:
     def __init__(self, path: Path):
         self.path = path
 
     def load(self) -> Any:
+        if orjson is not None:
+            try:
+                return orjson.loads(self.path.read_bytes())
+            except orjson.JSONDecodeError:
+                # NaN/Infinity from an earlier stdlib json.dumps: only the stdlib parser reads them
+                pass
         with self.path.open("r", encoding="utf-8") as f:
             return json.load(f)
 
     def save(self, data: Any) -> None:
-        tmp = self.path.with_suffix(".tmp")
-        with tmp.open("w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        tmp.replace(self.path)
+        if orjson is not None:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            payload = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        atomic_write_bytes(self.path, payload)
@@ -1,11 +1,24 @@
 # adapters/ledm_client.py
 from __future__ import annotations
-import time
-from typing import Iterable, List, Optional, Tuple
+import re
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
 import requests
 import urllib3
-from xml.etree import ElementTree as ET
-from adapters.http_legacy import make_legacy_session
+from adapters.host_health import is_down, mark_down, mark_up
+from adapters.polling import OnError, log_failure, poll_many
+from adapters.http_legacy import thread_legacy_session
+
+# LEDM endpoints are polled with verify=False against self-signed printer certs
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+try:
+    from lxml import etree as ET  # type: ignore
+    _HAS_LXML = True
+except ImportError:
+    from xml.etree import ElementTree as ET
+    _HAS_LXML = False
 
 SEVERITY_ORDER = {
     "CRITICAL": 3,
@@ -16,29 +29,22 @@ SEVERITY_ORDER = {
     "INFO": 1,
 }
 
+_SEVERITY_TAGS = frozenset({"Severity"})
+_EVENT_CODE_TAGS = frozenset({"Code", "EventCode", "ID", "ErrorCode"})
+_EVENT_DESC_TAGS = frozenset({"Description", "EventDescription", "Name", "Reason"})
+_ALERT_CODE_TAGS = frozenset({"ProductStatusAlertID", "StringId", "ID", "Code"})
+_ALERT_DESC_TAGS = frozenset({"AlertDetailsUserAction", "Description", "Name", "Reason"})
+_PROBLEM_TAGS = frozenset({"LocString", "StatusString", "StatusMessage", "Reason", "DetailedReason", "State"})
+
 def _lname(tag: str) -> str:
     return tag.split("}", 1)[-1] if "}" in tag else tag
 
-def _iter_elems_by_local(root: Optional[ET.Element], local_names: Iterable[str]) -> List[ET.Element]:
-    if root is None:
-        return []
-    wanted = set(local_names)
-    out: List[ET.Element] = []
-    for el in root.iter():
-        try:
-            if _lname(el.tag) in wanted:
-                out.append(el)
-        except Exception:
-            pass
-    return out
-
-def _text_of_first(root: Optional[ET.Element], candidates: Iterable[str]) -> Optional[str]:
-    if root is None:
-        return None
-    wanted = set(candidates)
-    for el in root.iter():
-        if _lname(getattr(el, "tag", "")) in wanted:
-            txt = (el.text or "").strip()
+def _first_text(el, names: FrozenSet[str]) -> Optional[str]:
+    # descendant-or-self in document order; first non-empty text wins
+    for sub in el.iter():
+        tag = sub.tag
+        if isinstance(tag, str) and _lname(tag) in names:
+            txt = (sub.text or "").strip()
             if txt:
                 return txt
     return None
@@ -63,120 +69,194 @@ def _triage_three(sev: Optional[str]) -> str:
         return "informational"
     return "informational"
 
-def _parse_xml(xml_bytes: Optional[bytes]) -> Optional[ET.Element]:
-    if not xml_bytes:
-        return None
-    try:
-        return ET.fromstring(xml_bytes)
-    except ET.ParseError:
-        return None
+_LEDM_HEADERS = {"Accept": "application/xml,text/xml;q=0.9,*/*;q=0.5"}
+_SCHEMES = {"https": ("https", "http"), "http": ("http", "https")}
+# host -> scheme that last served LEDM XML; tried first on the next poll
+_SCHEME_CACHE: Dict[str, str] = {}
 
 def _try_get(session: requests.Session, host: str, path: str, *, timeout: float, verify_ssl: bool = False) -> Optional[bytes]:
-    if not verify_ssl:
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-    for scheme in ("https", "http"):
+    unreachable = True
+    for scheme in _SCHEMES[_SCHEME_CACHE.get(host, "https")]:
         url = f"{scheme}://{host}{path}"
         try:
-            r = session.get(url, timeout=timeout, verify=verify_ssl, headers={"Accept": "application/xml,text/xml;q=0.9,*/*;q=0.5"})
+            r = session.get(url, timeout=timeout, verify=verify_ssl, headers=_LEDM_HEADERS, stream=False)
+            unreachable = False
             if r.status_code == 200 and r.content and b"<html" not in r.content[:200].lower():
+                _SCHEME_CACHE[host] = scheme
+                mark_up(host, "http")
                 return r.content
-        except Exception:
+        except requests.exceptions.ConnectTimeout:
             pass
-        time.sleep(0.03)
+        except Exception:
+            unreachable = False
+    if unreachable:
+        mark_down(host, f"connect timeout on {path}", scope="http")
+    else:
+        mark_up(host, "http")
     return None
 
-def fetch_ledm_roots(ip: str, *, timeout: float, pause_between_reqs: float = 0.08) -> Tuple[Optional[ET.Element], Optional[ET.Element]]:
-    s = make_legacy_session(timeout=timeout)
-    status = _try_get(s, ip, "/DevMgmt/ProductStatusDyn.xml", timeout=timeout, verify_ssl=False)
-    events = _try_get(s, ip, "/EventMgmt/EventTable.xml", timeout=timeout, verify_ssl=False)
-    if pause_between_reqs:
-        time.sleep(pause_between_reqs)
-    return _parse_xml(status), _parse_xml(events)
+# long-lived so its workers keep their thread-local sessions between polls
+_FETCH_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="ledm")
+
+def _fetch_path(ip: str, path: str, timeout: float) -> Optional[bytes]:
+    return _try_get(thread_legacy_session(timeout=timeout), ip, path, timeout=timeout, verify_ssl=False)
+
+def fetch_ledm_bytes(ip: str, *, timeout: float) -> Tuple[Optional[bytes], Optional[bytes]]:
+    if is_down(ip, "http"):
+        return None, None
+    events_f = _FETCH_POOL.submit(_fetch_path, ip, "/EventMgmt/EventTable.xml", timeout)
+    status = _fetch_path(ip, "/DevMgmt/ProductStatusDyn.xml", timeout)
+    try:
+        events = events_f.result()
+    except Exception:
+        events = None
+    return status, events
+
+_STATUS_CATEGORY = {
+    "ready": "Ready",
+    "processing": "Processing",
+    "warmup": "Warming up",
+    "attention": "Needs attention",
+    "interventionrequired": "Needs attention",
+    "error": "Error",
+    "idle": "Idle",
+    "sleep": "Sleep",
+}
+_ALERT_RANK = {"CRITICAL": 3, "ERROR": 3, "WARNING": 2, "INFO": 1, "STRICTERROR": 3, "STRICTWARNING": 2}
+
+def _category_problem(cat: str) -> Optional[str]:
+    cat = (cat or "").strip().lower()
+    return _STATUS_CATEGORY.get(cat, cat.capitalize()) if cat else None
 
-def best_event_from_table(event_root: Optional[ET.Element]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
-    if event_root is None:
+def _iterparse(xml_bytes: bytes, events: Tuple[str, ...]):
+    if _HAS_LXML:
+        return ET.iterparse(BytesIO(xml_bytes), events=events, recover=True, resolve_entities=False)
+    return ET.iterparse(BytesIO(xml_bytes), events=events)
+
+def _drop(el, parents: list) -> None:
+    """Free a scored element and detach it, so the root doesn't keep one empty shell per row."""
+    el.clear()
+    parent = el.getparent() if _HAS_LXML else (parents[-1] if parents else None)
+    if parent is not None:
+        parent.remove(el)
+
+def scan_event_table(xml_bytes: Optional[bytes]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Highest-severity Event as (code, description, severity); one streaming pass, each Event detached once scored."""
+    if not xml_bytes:
         return (None, None, None)
     best = None
     best_rank = -1
-    for ev in _iter_elems_by_local(event_root, ["Event"]):
-        sev_raw = (_text_of_first(ev, ["Severity"]) or "").strip().upper()
-        rank = SEVERITY_ORDER.get(sev_raw, -1)
-        if rank >= best_rank:
-            code = (_text_of_first(ev, ["Code", "EventCode", "ID", "ErrorCode"]) or "").strip()
-            desc = (_text_of_first(ev, ["Description", "EventDescription", "Name", "Reason"]) or "").strip()
-            best = (code if code else None, desc if desc else None, _triage_three(sev_raw))
-            best_rank = rank
+    # stdlib elements don't know their parent, so only there do "start" events feed a stack
+    events = ("end",) if _HAS_LXML else ("start", "end")
+    parents: list = []
+    try:
+        for event, el in _iterparse(xml_bytes, events):
+            if event == "start":
+                parents.append(el)
+                continue
+            if parents:
+                parents.pop()
+            if _lname(el.tag) == "Event":
+                sev_raw = (_first_text(el, _SEVERITY_TAGS) or "").upper()
+                rank = SEVERITY_ORDER.get(sev_raw, -1)
+                if rank >= best_rank:
+                    best = (_first_text(el, _EVENT_CODE_TAGS), _first_text(el, _EVENT_DESC_TAGS), _triage_three(sev_raw))
+                    best_rank = rank
+                _drop(el, parents)
+    except Exception:
+        # unparseable document
+        return (None, None, None)
     return best if best else (None, None, None)
 
-def problem_from_status(status_root: Optional[ET.Element]) -> Optional[str]:
-    s = _text_of_first(status_root, ["LocString", "StatusString", "StatusMessage", "Reason", "DetailedReason", "State"])
-    if s:
-        return s
-    cat = (_text_of_first(status_root, ["StatusCategory"]) or "").strip().lower()
-    if cat:
-        mapping = {
-            "ready": "Ready",
-            "processing": "Processing",
-            "warmup": "Warming up",
-            "attention": "Needs attention",
-            "interventionrequired": "Needs attention",
-            "error": "Error",
-            "idle": "Idle",
-            "sleep": "Sleep",
-        }
-        return mapping.get(cat, cat.capitalize())
-    return None
-
-def _best_alert_from_status(status_root: Optional[ET.Element]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
-    if status_root is None:
-        return (None, None, None)
-    alerts = _iter_elems_by_local(status_root, ["Alert"])
-    if not alerts:
-        return (None, None, None)
-    sev_rank = {"CRITICAL": 3, "ERROR": 3, "WARNING": 2, "INFO": 1, "STRICTERROR": 3, "STRICTWARNING": 2}
+def scan_status(xml_bytes: Optional[bytes]) -> Tuple[Optional[str], Tuple[Optional[str], Optional[str], Optional[str]]]:
+    """
+    Status problem text plus the highest-ranked Alert, in one streaming pass.
+    Start-order sequence numbers keep the document-order "first text wins" rule.
+    """
+    none3: Tuple[Optional[str], Optional[str], Optional[str]] = (None, None, None)
+    if not xml_bytes:
+        return None, none3
+    seq = 0
+    order = {}
+    problem: Optional[Tuple[int, str]] = None
+    category: Optional[Tuple[int, str]] = None
     best = None
     best_score = -1
-    for a in alerts:
-        sev_raw = (_text_of_first(a, ["Severity"]) or "Info").strip().upper()
-        code = (_text_of_first(a, ["ProductStatusAlertID", "StringId", "ID", "Code"]) or "").strip()
-        desc = (_text_of_first(a, ["AlertDetailsUserAction", "Description", "Name", "Reason"]) or "").strip()
-        score = sev_rank.get(sev_raw, 0)
-        if score >= best_score:
-            best = (code if code else None, desc if desc else None, _triage_three(sev_raw))
-            best_score = score
-    return best if best else (None, None, None)
+    parents: list = []
+    try:
+        for event, el in _iterparse(xml_bytes, ("start", "end")):
+            if event == "start":
+                order[el] = seq
+                seq += 1
+                parents.append(el)
+                continue
+            parents.pop()
+            name = _lname(el.tag)
+            n = order.pop(el, seq)
+            if name in _PROBLEM_TAGS or name == "StatusCategory":
+                txt = (el.text or "").strip()
+                if txt:
+                    if name == "StatusCategory":
+                        if category is None or n < category[0]:
+                            category = (n, txt)
+                    elif problem is None or n < problem[0]:
+                        problem = (n, txt)
+            if name == "Alert":
+                sev_raw = (_first_text(el, _SEVERITY_TAGS) or "Info").upper()
+                score = _ALERT_RANK.get(sev_raw, 0)
+                if score >= best_score:
+                    best = (_first_text(el, _ALERT_CODE_TAGS), _first_text(el, _ALERT_DESC_TAGS), _triage_three(sev_raw))
+                    best_score = score
+                _drop(el, parents)
+    except Exception:
+        return None, none3
+    if problem is not None:
+        return problem[1], best or none3
+    return (_category_problem(category[1]) if category else None), best or none3
+
+_CRIT_RE = re.compile(r"jam|door|open|cover|fault|failure|error|empty|replace", re.I)
+_WARN_RE = re.compile(r"low|depleted|almost|calibrat|warming|busy|sleep|power saver|attention", re.I)
 
 def derive_severity_from_problem(problem: Optional[str]) -> str:
     if not problem:
         return "informational"
-    p = problem.lower()
-    if any(k in p for k in ["jam", "door", "open", "cover", "fault", "failure", "error", "empty", "replace"]):
+    if _CRIT_RE.search(problem):
         return "critical"
-    if any(k in p for k in ["low", "depleted", "almost", "calibrat", "warming", "busy", "sleep", "power saver", "attention"]):
+    if _WARN_RE.search(problem):
         return "warning"
     return "informational"
 
+_UNKNOWN_RE = re.compile(r"unknown", re.I)
+_ACK_RE = re.compile(r"acknowledgeconsumablestate", re.I)
+_READY_RE = re.compile(r"ready", re.I)
+_NOT_READY_RE = re.compile(r"not ready|unready", re.I)
+_SLEEP_RE = re.compile(r"sleep|inpowersave|שינה", re.I)
+
 def normalize_problem_and_severity(problem: Optional[str], severity: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
     p = (problem or "").strip()
-    low = p.lower()
-    if "unknown" in low:
+    if _UNKNOWN_RE.search(p):
         return (None, "informational")
-    if "acknowledgeconsumablestate" in low:
+    if _ACK_RE.search(p):
         return ("Ready", "informational")
-    if ("ready" in low and "not ready" not in low and "unready" not in low) or ("מוכן" in p):
+    if ("מוכן" in p) or (_READY_RE.search(p) and not _NOT_READY_RE.search(p)):
         return ("Ready", "informational")
-    if ("sleep" in low) or ("inpowersave" in low) or ("שינה" in p):
+    if _SLEEP_RE.search(p):
         return ("Sleeping", "informational")
     return (problem, severity)
 
 def get_ledm_problem_and_severity(ip: str, *, timeout: float) -> Tuple[str, str]:
-    status_root, events_root = fetch_ledm_roots(ip, timeout=timeout)
-    _ev_code, ev_problem, ev_sev = best_event_from_table(events_root)
-    st_problem = problem_from_status(status_root)
-    _al_code, al_problem, al_sev = _best_alert_from_status(status_root)
+    status, events = fetch_ledm_bytes(ip, timeout=timeout)
+    _ev_code, ev_problem, ev_sev = scan_event_table(events)
+    st_problem, (_al_code, al_problem, al_sev) = scan_status(status)
     problem = ev_problem or al_problem or st_problem or "Unknown"
     severity = ev_sev or al_sev or derive_severity_from_problem(problem)
     problem, severity = normalize_problem_and_severity(problem, severity)
     if not severity:
         severity = "informational"
     return problem or "Normal", severity
+
+def get_ledm_problem_and_severity_batch(ips: Iterable[str], *, timeout: float, on_error: Optional[OnError] = None,
+                                        max_workers: int = 32) -> Dict[str, Tuple[str, str]]:
+    """Poll many printers concurrently; a failed IP maps to on_error(ip, exc), by default ("Offline", "critical")."""
+    return poll_many(get_ledm_problem_and_severity, ips, timeout=timeout, max_workers=max_workers,
+                     on_error=on_error or log_failure(lambda: ("Offline", "critical")))
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from operator import itemgetter
 from pathlib import Path
 from typing import Any, Dict, List
 from openpyxl import load_workbook
@@ -20,38 +21,37 @@ def _prepare_headers(first_row: List[Any]) -> tuple[List[str], List[int]]:
         keep.append(idx)
     return headers, keep
 
-def _row_is_empty(row: tuple[Any, ...] | None, indices: List[int]) -> bool:
-    if row is None:
-        return True
-    for i in indices:
-        v = row[i] if i < len(row) else None
-        if v is None:
-            continue
-        if not (isinstance(v, str) and v.strip() == ""):
-            return False
-    return True
+def _is_blank(v: Any) -> bool:
+    return v is None or (isinstance(v, str) and not v.strip())
 
 def read_locations_xlsx(path: str | Path, sheet: str | None = None) -> List[Dict[str, Any]]:
     p = Path(path)
     if not p.exists():
         return []
     wb = load_workbook(filename=str(p), data_only=True, read_only=True)
-    ws = wb[sheet] if sheet else wb.worksheets[0]
-    it = ws.iter_rows(values_only=True)
     try:
-        header_row = next(it)
-    except StopIteration:
-        return []
-    headers, keep = _prepare_headers(list(header_row or []))
-    if not headers:
-        return []
-    out: List[Dict[str, Any]] = []
-    for row in it:
-        if _row_is_empty(row, keep):
-            continue
-        item: Dict[str, Any] = {}
-        for col_idx, h in zip(keep, headers):
-            val = row[col_idx] if row is not None and col_idx < len(row) else None
-            item[h] = val
-        out.append(item)
-    return out
+        ws = wb[sheet] if sheet else wb.worksheets[0]
+        it = ws.values
+        try:
+            header_row = next(it)
+        except StopIteration:
+            return []
+        headers, keep = _prepare_headers(list(header_row or []))
+        if not headers:
+            return []
+        width = keep[-1] + 1
+        getter = itemgetter(*keep)
+        single = len(keep) == 1
+        out: List[Dict[str, Any]] = []
+        for row in it:
+            if row is None:
+                continue
+            if len(row) < width:
+                row = tuple(row) + (None,) * (width - len(row))
+            vals = (getter(row),) if single else getter(row)
+            if all(_is_blank(v) for v in vals):
+                continue
+            out.append(dict(zip(headers, vals)))
+        return out
+    finally:
+        wb.close()
@@ -1,18 +1,31 @@
 # adapters/mailer.py
 from __future__ import annotations
-import os, tempfile, time
+import os, tempfile, threading, time
 from email.message import EmailMessage
 from email.policy import default as default_policy
 from pathlib import Path
 
+_OUTLOOK = None
+_OUTLOOK_LOCK = threading.Lock()
+
+def _outlook_app(win32, *, fresh: bool = False):
+    global _OUTLOOK
+    with _OUTLOOK_LOCK:
+        if _OUTLOOK is None or fresh:
+            # late binding is enough for a few properties; EnsureDispatch would
+            # build the Outlook typelib cache on a cold profile first
+            _OUTLOOK = win32.Dispatch("Outlook.Application")
+        return _OUTLOOK
+
 def send_via_outlook(to_addr: str, subject: str, html_content: str) -> bool:
+    global _OUTLOOK
     try:
         import win32com.client as win32
         try:
-            outlook = win32.gencache.EnsureDispatch("Outlook.Application")
+            mail = _outlook_app(win32).CreateItem(0)
         except Exception:
-            outlook = win32.Dispatch("Outlook.Application")
-        mail = outlook.CreateItem(0)
+            # cached handle went stale (Outlook was closed) -> dispatch again
+            mail = _outlook_app(win32, fresh=True).CreateItem(0)
         mail.To = to_addr
         mail.Subject = subject
         mail.BodyFormat = 2
@@ -20,6 +33,7 @@ def send_via_outlook(to_addr: str, subject: str, html_content: str) -> bool:
         mail.Display(False)  # open draft window
         return True
     except Exception:
+        _OUTLOOK = None
         return False
 
 def write_eml_draft(to_addr: str, subject: str, html_content: str) -> Path:
@@ -0,0 +1,36 @@
+# adapters/polling.py
+from __future__ import annotations
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable
+from settings.logging_setup import flog
+
+OnError = Callable[[str, Exception], Any]
+
+
+def log_failure(fallback: Callable[[], Any]) -> OnError:
+    """Default on_error: log the failure and use fallback() as that IP's result."""
+    def _on_error(ip: str, e: Exception) -> Any:
+        flog(f"[{ip}] error: {e}", logging.WARNING)
+        return fallback()
+    return _on_error
+
+
+def poll_many(fn: Callable[..., Any], ips: Iterable[str], *, on_error: OnError,
+              max_workers: int, **kw: Any) -> Dict[str, Any]:
+    """
+    Run fn(ip, **kw) for each distinct IP on a thread pool.
+    Returns {ip: result}; an IP whose call raised maps to on_error(ip, exc).
+    """
+    uniq = list(dict.fromkeys(ips))
+    out: Dict[str, Any] = {}
+    if not uniq:
+        return out
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(uniq))) as pool:
+        futures = {ip: pool.submit(fn, ip, **kw) for ip in uniq}
+    for ip, fut in futures.items():
+        try:
+            out[ip] = fut.result()
+        except Exception as e:
+            out[ip] = on_error(ip, e)
+    return out
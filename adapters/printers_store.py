@@ -4,6 +4,12 @@ from pathlib import Path
 import json
 import os
 from typing import Any, Dict
+from adapters.json_store import atomic_write_bytes
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
 
 
 def find_printers_json(explicit: str | None, *, project_root: Path) -> Path:
@@ -31,12 +37,25 @@ def find_printers_json(explicit: str | None, *, project_root: Path) -> Path:
 
 
 def load_printers(path: Path) -> Dict[str, Any]:
+    if orjson is not None:
+        try:
+            return orjson.loads(path.read_bytes())
+        except orjson.JSONDecodeError:
+            # NaN/Infinity from an earlier stdlib json.dumps: only the stdlib parser reads them
+            pass
     with path.open("r", encoding="utf-8") as f:
         return json.load(f)
 
 
 def save_printers(path: Path, data: Dict[str, Any]) -> None:
-    tmp = path.with_suffix(".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    tmp.replace(path)
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    # nothing changed -> leave the file (and its mtime) alone
+    try:
+        if path.read_bytes() == payload:
+            return
+    except OSError:
+        pass
+    atomic_write_bytes(path, payload)
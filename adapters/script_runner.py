@@ -1,10 +1,18 @@
 # adapters/script_runner.py
 from __future__ import annotations
+import ast
+import importlib
+import io
+import logging
+import os
 import subprocess
 import sys
+import threading
 import time
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import IO, Callable, Optional, List, Tuple
 
 from settings.logging_setup import flog
 from core.pipeline import PlanItem
@@ -30,53 +38,153 @@ def _module_for_path(path: Path, cwd: Path) -> Optional[str]:
     return ".".join(parts) if parts else None
 
 
-def run_script(item: PlanItem, cwd: Path, debug: bool = False) -> StepResult:
-    module = _module_for_path(item.path, cwd)
-    if module:
-        cmd = [sys.executable, "-m", module, *item.args]
-    else:
-        cmd = [sys.executable, str(item.path), *item.args]
+def _defines_run(path: Path) -> bool:
+    # checked on the syntax tree, before importing: an unguarded legacy script
+    # would otherwise run its top-level code inside the CLI process
+    try:
+        tree = ast.parse(path.read_bytes(), filename=str(path))
+    except Exception:
+        return False
+    return any(isinstance(node, ast.FunctionDef) and node.name == "run" for node in tree.body)
+
+
+def _in_process_entry(module: str, item: PlanItem) -> Optional[Callable[[List[str]], int]]:
+    """
+    Import the step's module and return its run(argv) -> int, or None when the
+    step does not expose run() and must be launched as a subprocess instead.
+    """
+    if not _defines_run(item.path):
+        flog(f"{item.title}: {module} has no run(argv); running as subprocess")
+        return None
+    try:
+        mod = importlib.import_module(module)
+    except Exception as e:
+        flog(f"{item.title}: import of {module} failed ({e!r}); running as subprocess", level=logging.WARNING)
+        return None
+    entry = getattr(mod, "run", None)
+    if not callable(entry):
+        flog(f"{item.title}: {module} has no run(argv); running as subprocess")
+        return None
+    return entry
 
+
+def _run_in_process(entry: Callable[[List[str]], int], item: PlanItem, cwd: Path) -> Tuple[int, str, str]:
+    """Call a step's run(argv) in this interpreter; returns (exit_code, stdout, stderr)."""
+    out, err = io.StringIO(), io.StringIO()
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    saved_argv, saved_cwd = sys.argv, os.getcwd()
+    sys.argv = [str(item.path), *item.args]
+    try:
+        os.chdir(cwd)
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                code = entry(list(item.args))
+            except SystemExit as e:
+                code = e.code
+            except Exception:
+                traceback.print_exc()
+                code = 1
+            if isinstance(code, str):
+                print(code, file=sys.stderr)
+                code = 1
+    finally:
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+        # drop handlers a step's logging.basicConfig() may have attached and
+        # undo the level it asked for (set_step_log_level)
+        for h in root.handlers[:]:
+            if h not in saved_handlers:
+                root.removeHandler(h)
+        root.setLevel(saved_level)
+    return (code or 0), out.getvalue(), err.getvalue()
+
+
+def _pump(stream: IO[str], prefix: str, level: int, debug: bool) -> None:
+    for line in stream:
+        line = line.rstrip()
+        flog(f"{prefix}{line}", level=level)
+        if debug:
+            print(line, flush=True)
+    stream.close()
+
+
+def _run_streaming(cmd: List[str], item: PlanItem, cwd: Path, debug: bool) -> int:
+    """Run cmd as a child process, logging its output line by line as it arrives."""
+    # a Python child block-buffers stdout on a pipe; unbuffer it so lines really stream.
+    # errors="replace": one undecodable byte must not kill a reader and stall the pipe
+    env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+    proc = subprocess.Popen(cmd, cwd=cwd, env=env, text=True, encoding="utf-8", errors="replace", bufsize=1,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    readers = [
+        threading.Thread(target=_pump, args=(proc.stdout, f"{item.title} stdout: ", logging.INFO, debug),
+                         daemon=True),
+        threading.Thread(target=_pump, args=(proc.stderr, f"{item.title} stderr: ", logging.WARNING, debug),
+                         daemon=True),
+    ]
+    for t in readers:
+        t.start()
+    returncode = proc.wait()
+    for t in readers:
+        t.join()
+    return returncode
+
+
+def run_script(item: PlanItem, cwd: Path, debug: bool = False) -> StepResult:
     if debug:
         print(f"\n----- {item.title} -----", flush=True)
         print(f"Script: {item.path}", flush=True)
-        print(f"Command: {cmd!r}", flush=True)
 
     flog("")
     flog(f"----- {item.title} -----")
     flog(f"Script path: {item.path}")
-    flog(f"Command   : {cmd!r}")
 
     start = time.perf_counter()
-    try:
-        proc = subprocess.run(cmd, cwd=cwd, text=True, capture_output=True, check=False)
-    except Exception as e:
-        elapsed = time.perf_counter() - start
-        msg = f"{item.title}: failed to launch: {e!r}"
-        flog(msg, level=40)
+    module = _module_for_path(item.path, cwd)
+    entry = _in_process_entry(module, item) if module else None
+    if entry is not None:
+        if debug:
+            print(f"In-process: {module}.run({list(item.args)!r})", flush=True)
+        flog(f"In-process: {module}.run({list(item.args)!r})")
+        returncode, stdout, stderr = _run_in_process(entry, item, cwd)
+    else:
+        if module:
+            cmd = [sys.executable, "-m", module, *item.args]
+        else:
+            cmd = [sys.executable, str(item.path), *item.args]
         if debug:
-            print(f"[ERROR] {msg}", flush=True)
-            print(f"✗ {item.title} (launch error)", flush=True)
-        return StepResult(item, ok=False, exit_code=None, elapsed_s=elapsed, note="launch error")
+            print(f"Command: {cmd!r}", flush=True)
+        flog(f"Command   : {cmd!r}")
+        stdout = stderr = ""
+        try:
+            returncode = _run_streaming(cmd, item, cwd, debug)
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            msg = f"{item.title}: failed to launch: {e!r}"
+            flog(msg, level=40)
+            if debug:
+                print(f"[ERROR] {msg}", flush=True)
+                print(f"✗ {item.title} (launch error)", flush=True)
+            return StepResult(item, ok=False, exit_code=None, elapsed_s=elapsed, note="launch error")
 
     elapsed = time.perf_counter() - start
 
-    if proc.stdout:
-        flog(f"{item.title} stdout:\n{proc.stdout.rstrip()}")
+    if stdout:
+        flog(f"{item.title} stdout:\n{stdout.rstrip()}")
         if debug:
-            print(proc.stdout.rstrip(), flush=True)
+            print(stdout.rstrip(), flush=True)
 
-    if proc.stderr:
-        flog(f"{item.title} stderr:\n{proc.stderr.rstrip()}", level=30)
+    if stderr:
+        flog(f"{item.title} stderr:\n{stderr.rstrip()}", level=30)
         if debug:
-            print(proc.stderr.rstrip(), flush=True)
+            print(stderr.rstrip(), flush=True)
 
-    flog(f"{item.title}: exit code {proc.returncode} ({elapsed:.2f}s)")
+    flog(f"{item.title}: exit code {returncode} ({elapsed:.2f}s)")
 
-    if proc.returncode == 0:
+    if returncode == 0:
         return StepResult(item, ok=True, exit_code=0, elapsed_s=elapsed)
     else:
-        return StepResult(item, ok=False, exit_code=proc.returncode, elapsed_s=elapsed)
+        return StepResult(item, ok=False, exit_code=returncode, elapsed_s=elapsed)
 
 
 def summarize_results(results: List[StepResult]) -> tuple[bool, List[StepResult]]:
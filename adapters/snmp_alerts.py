@@ -1,6 +1,8 @@
 # adapters/snmp_alerts.py
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from adapters.host_health import is_down
+from adapters.polling import OnError, log_failure, poll_many
 from adapters.snmp_client import walk_oid
 
 ALERT_TABLE_ROOT = "1.3.6.1.2.1.43.18.1.1"
@@ -32,6 +34,8 @@ HR_BITS = [
     ("inputTrayEmpty", 13),
     ("overduePreventMaint", 14),
 ]
+_HR_BY_POS = {pos: name for name, pos in HR_BITS}
+_HR_MASK = sum(1 << pos for _, pos in HR_BITS)
 
 SUPPRESS_PHRASES = {
     "sleep mode on",
@@ -91,46 +95,45 @@ def _mk_msg(severity: str, group: Optional[int], code: Optional[int], desc: Opti
 
 def _hr_bits_as_flags(bits: int) -> List[str]:
     out: List[str] = []
-    for name, bitpos in HR_BITS:
-        if bits & (1 << bitpos):
-            out.append(name)
+    bits &= _HR_MASK
+    while bits:
+        lsb = bits & -bits
+        out.append(_HR_BY_POS[lsb.bit_length() - 1])
+        bits ^= lsb
     return out
 
+def _safe_int(v: Any) -> Optional[int]:
+    try:
+        return int(v)
+    except Exception:
+        return None
+
+def _safe_text(v: Any) -> Optional[str]:
+    return _to_text(v).strip() or None
+
+_ALERT_COL_PARSERS = {
+    COL_SEVERITY: _safe_int,
+    COL_GROUP: _safe_int,
+    COL_GROUPIDX: _safe_int,
+    COL_CODE: _safe_int,
+    COL_DESC: _safe_text,
+    COL_TIME: lambda v: _to_text(v).strip(),
+}
+
 def _snmp_alert_rows(ip: str, community: str, timeout: Optional[float]) -> Dict[int, Dict[str, Any]]:
     rows: Dict[int, Dict[str, Any]] = {}
+    parsers = _ALERT_COL_PARSERS
     for oid, value in walk_oid(ip, ALERT_TABLE_ROOT, community=community, timeout=timeout):
-        parts = oid.split(".")
-        if len(parts) < 2:
+        head, _, row = oid.rpartition(".")
+        if not head:
             continue
-        col = parts[-2]
-        row = int(parts[-1])
-        rowdict = rows.setdefault(row, {})
-        if col == COL_SEVERITY:
-            try:
-                rowdict[COL_SEVERITY] = int(value)
-            except Exception:
-                pass
-        elif col == COL_GROUP:
-            try:
-                rowdict[COL_GROUP] = int(value)
-            except Exception:
-                pass
-        elif col == COL_GROUPIDX:
-            try:
-                rowdict[COL_GROUPIDX] = int(value)
-            except Exception:
-                pass
-        elif col == COL_CODE:
-            try:
-                rowdict[COL_CODE] = int(value)
-            except Exception:
-                pass
-        elif col == COL_DESC:
-            txt = _to_text(value).strip()
-            if txt:
-                rowdict[COL_DESC] = txt
-        elif col == COL_TIME:
-            rowdict[COL_TIME] = _to_text(value).strip()
+        col = head.rpartition(".")[2]
+        rowdict = rows.setdefault(int(row), {})
+        parser = parsers.get(col)
+        if parser is not None:
+            v = parser(value)
+            if v is not None:
+                rowdict[col] = v
     return rows
 
 def _snmp_hr_errorstate(ip: str, community: str, timeout: Optional[float]) -> Optional[Tuple[str, str]]:
@@ -149,17 +152,16 @@ def _snmp_hr_errorstate(ip: str, community: str, timeout: Optional[float]) -> Op
         return msg, sev
     return None
 
+_SEVERITY_PICK_ORDER = ("critical", "warning", "other", "unknown")
+
 def _decide_message_from_rows(rows: Dict[int, Dict[str, Any]]) -> Optional[Tuple[str, str]]:
     if not rows:
         return None
-    ordered = sorted(rows.items(), key=lambda t: t[0])
-    chosen_msg: Optional[str] = None
-    chosen_tag: Optional[str] = None
-    for severity_pick in ("critical", "warning", "other", "unknown"):
-        for _, r in ordered:
-            tag = _severity_tag(r.get(COL_SEVERITY))
-            if tag != severity_pick:
-                continue
+    buckets: Dict[str, List[Dict[str, Any]]] = {tag: [] for tag in _SEVERITY_PICK_ORDER}
+    for _, r in sorted(rows.items(), key=lambda t: t[0]):
+        buckets[_severity_tag(r.get(COL_SEVERITY))].append(r)
+    for severity_pick in _SEVERITY_PICK_ORDER:
+        for r in buckets[severity_pick]:
             msg = _mk_msg(
                 severity_pick,
                 r.get(COL_GROUP),
@@ -168,15 +170,8 @@ def _decide_message_from_rows(rows: Dict[int, Dict[str, Any]]) -> Optional[Tuple
                 r.get(COL_GROUPIDX),
             )
             if msg:
-                chosen_msg = msg
-                chosen_tag = severity_pick
-                break
-        if chosen_msg:
-            break
-    if not chosen_msg:
-        return None
-    final_sev = "critical" if chosen_tag == "critical" else "warning"
-    return chosen_msg, final_sev
+                return msg, ("critical" if severity_pick == "critical" else "warning")
+    return None
 
 def process_snmp_alerts(ip: str, *, community: str, timeout: Optional[float]) -> Tuple[str, str]:
     rows = _snmp_alert_rows(ip, community, timeout)
@@ -184,7 +179,17 @@ def process_snmp_alerts(ip: str, *, community: str, timeout: Optional[float]) ->
         decided = _decide_message_from_rows(rows)
         if decided:
             return decided
+    elif is_down(ip, "snmp"):
+        # the alert walk just timed out; the error-state walk would only time out again
+        return "Normal", "informational"
     hr = _snmp_hr_errorstate(ip, community, timeout)
     if hr:
         return hr
     return "Normal", "informational"
+
+def process_snmp_alerts_batch(ips: Iterable[str], *, community: str, timeout: Optional[float],
+                              on_error: Optional[OnError] = None, max_workers: int = 16) -> Dict[str, Tuple[str, str]]:
+    """Poll many printers concurrently; a failed IP maps to on_error(ip, exc), by default ("Offline", "critical").
+    max_workers stays modest so retrying walks don't flood the network with UDP."""
+    return poll_many(process_snmp_alerts, ips, community=community, timeout=timeout, max_workers=max_workers,
+                     on_error=on_error or log_failure(lambda: ("Offline", "critical")))
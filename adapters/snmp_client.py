@@ -1,15 +1,30 @@
 # adapters/snmp_client.py
 from __future__ import annotations
 import asyncio
+import concurrent.futures
 import inspect
+import os
+import queue
 import socket
-from typing import Any
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
 from puresnmp import Client, V2C, PyWrapper
 from puresnmp.exc import Timeout as SnmpTimeout  # <-- important
 from settings.logging_setup import flog
+from adapters.host_health import is_down, mark_down, mark_up
+
+try:
+    import uvloop  # type: ignore
+except ImportError:
+    uvloop = None
 
 DEFAULT_TIMEOUT = 6.0
-DEFAULT_RETRIES = 10
+# puresnmp retries each request flatly; keep the count low so a dead host
+# costs (retries + 1) * timeout per walk rather than 11x
+DEFAULT_RETRIES = int(os.getenv("PRINTER_SNMP_RETRIES", "2"))
+
+# rows per GETBULK response; a supplies table comes back in a couple of round trips
+BULK_SIZE = 25
 
 _BAD_HOSTS = {"", "-", "n/a", "na", "none", "0.0.0.0"}
 
@@ -18,14 +33,31 @@ def _is_bad_host(host: str) -> bool:
     return host.strip().lower() in _BAD_HOSTS
 
 
-def make_snmp(host: str, community: str = "public", timeout: float | None = None) -> PyWrapper | None:
-    if _is_bad_host(host):
+def _note_failure(host: str, err: BaseException) -> None:
+    # only a failed name lookup means the host is gone; a timeout or a refused/unreachable
+    # UDP port just says SNMP is off, and HTTP on the same printer may still answer
+    if isinstance(err, socket.gaierror):
+        mark_down(host, str(err))
+    elif isinstance(err, (SnmpTimeout, asyncio.TimeoutError, OSError)):
+        mark_down(host, str(err), scope="snmp")
+
+
+def make_snmp(host: str, community: str = "public", timeout: float | None = None, retries: int | None = None) -> PyWrapper | None:
+    if _is_bad_host(host) or is_down(host, "snmp"):
         return None
     client = Client(host, V2C(community))
-    client.configure(timeout=timeout or DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES)
+    client.configure(timeout=timeout or DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES if retries is None else retries)
     return PyWrapper(client)
 
 
+def _start_walk(snmp: PyWrapper, base_oid: str):
+    # v2c: prefer GETBULK over one GETNEXT round trip per row
+    bulkwalk = getattr(snmp, "bulkwalk", None)
+    if bulkwalk is not None:
+        return bulkwalk([base_oid], bulk_size=BULK_SIZE)
+    return snmp.walk(base_oid)
+
+
 async def _collect_async_walk(async_gen) -> list[Any]:
     rows = []
     async for vb in async_gen:
@@ -33,43 +65,72 @@ async def _collect_async_walk(async_gen) -> list[Any]:
     return rows
 
 
+_DONE = object()
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """One background event loop for all async walks instead of asyncio.run per call."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                # uvloop only for this private loop; the process-wide policy is left alone
+                loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="snmp-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+async def _pump_walk(async_gen, q: queue.Queue) -> None:
+    # unbounded queue: a blocking put would stall every walk sharing the loop
+    try:
+        async for vb in async_gen:
+            q.put_nowait((vb.oid, vb.value))
+    finally:
+        q.put_nowait(_DONE)
+
+
+_WALK_TIMEOUTS = (SnmpTimeout, asyncio.TimeoutError, asyncio.CancelledError, concurrent.futures.CancelledError)
+
+
 def walk_oid(host: str, base_oid: str, *, community: str = "public", timeout: float | None = None):
     """
     Yield (oid, value) pairs.
-    - if puresnmp.walk(...) is async → run it and yield rows
+    - walks with GETBULK (bulkwalk) when the wrapper has it, else plain walk
+    - if the walk is async → run it on the shared loop and yield rows
     - if it's sync → just iterate
-    - if target doesn't answer / times out → log + yield nothing
+    - if target doesn't answer / times out → log + stop (rows already received stay yielded)
     """
     snmp = make_snmp(host, community, timeout)
     if snmp is None:
         return
 
     try:
-        walk_obj = snmp.walk(base_oid)
+        walk_obj = _start_walk(snmp, base_oid)
     except (ValueError, socket.gaierror, OSError) as e:
         flog(f"[SNMP] {host}: failed to start walk on {base_oid}: {e}")
+        _note_failure(host, e)
         return
 
-    # async case
+    # async case: rows stream in from the shared loop as they arrive
     if inspect.isasyncgen(walk_obj):
+        q: queue.Queue = queue.Queue()
+        fut = asyncio.run_coroutine_threadsafe(_pump_walk(walk_obj, q), _get_loop())
         try:
-            vbs = asyncio.run(_collect_async_walk(walk_obj))
-        except (SnmpTimeout, asyncio.TimeoutError, asyncio.CancelledError) as e:
+            while True:
+                item = q.get()
+                if item is _DONE:
+                    break
+                yield item
+            fut.result()
+            mark_up(host, "snmp")
+        except _WALK_TIMEOUTS as e:
             flog(f"[SNMP] {host}: walk timeout on {base_oid}: {e}")
-            return
-        except RuntimeError:
-            # if already in an event loop
-            loop = asyncio.new_event_loop()
-            try:
-                vbs = loop.run_until_complete(_collect_async_walk(walk_obj))
-            except (SnmpTimeout, asyncio.TimeoutError, asyncio.CancelledError) as e:
-                flog(f"[SNMP] {host}: walk timeout on {base_oid}: {e}")
-                return
-            finally:
-                loop.close()
-
-        for vb in vbs:
-            yield vb.oid, vb.value
+            _note_failure(host, e)
+        finally:
+            fut.cancel()
         return
 
     # sync case
@@ -78,7 +139,66 @@ def walk_oid(host: str, base_oid: str, *, community: str = "public", timeout: fl
             yield vb.oid, vb.value
     except (SnmpTimeout, ValueError, socket.gaierror, OSError) as e:
         flog(f"[SNMP] {host}: walk failed on {base_oid}: {e}")
+        _note_failure(host, e)
         return
+    mark_up(host, "snmp")
+
+
+def _run_coro(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+def walk_many(host: str, base_oids: Iterable[str], *, community: str = "public", timeout: float | None = None) -> Dict[str, List[Tuple[Any, Any]]]:
+    """
+    Walk several subtrees over one client; async walks run concurrently.
+    Returns {base_oid: [(oid, value), ...]}; a failed subtree is logged and maps to [].
+    """
+    bases = list(base_oids)
+    out: Dict[str, List[Tuple[Any, Any]]] = {b: [] for b in bases}
+    snmp = make_snmp(host, community, timeout)
+    if snmp is None:
+        return out
+
+    walks = {}
+    failed = False
+    for base in bases:
+        try:
+            walks[base] = _start_walk(snmp, base)
+        except (ValueError, socket.gaierror, OSError) as e:
+            flog(f"[SNMP] {host}: failed to start walk on {base}: {e}")
+            _note_failure(host, e)
+            failed = True
+
+    async_bases = [b for b, w in walks.items() if inspect.isasyncgen(w)]
+    if async_bases:
+        async def _gather():
+            return await asyncio.gather(*(_collect_async_walk(walks[b]) for b in async_bases), return_exceptions=True)
+
+        for base, res in zip(async_bases, _run_coro(_gather())):
+            if isinstance(res, (SnmpTimeout, asyncio.TimeoutError, asyncio.CancelledError)):
+                flog(f"[SNMP] {host}: walk timeout on {base}: {res}")
+                _note_failure(host, res)
+                failed = True
+                continue
+            if isinstance(res, BaseException):
+                flog(f"[SNMP] {host}: walk failed on {base}: {res}")
+                _note_failure(host, res)
+                failed = True
+                continue
+            out[base] = [(vb.oid, vb.value) for vb in res]
+
+    for base, walk_obj in walks.items():
+        if base in async_bases:
+            continue
+        try:
+            out[base] = [(vb.oid, vb.value) for vb in walk_obj]
+        except Exception as e:
+            flog(f"[SNMP] {host}: walk failed on {base}: {e}")
+            _note_failure(host, e)
+            failed = True
+    if not failed:
+        mark_up(host, "snmp")
+    return out
 
 
 def get_scalar(host: str, oid: str, *, community: str = "public", timeout: float | None = None):
@@ -86,7 +206,10 @@ def get_scalar(host: str, oid: str, *, community: str = "public", timeout: float
     if snmp is None:
         return None
     try:
-        return snmp.get(oid)
+        value = snmp.get(oid)
+        mark_up(host, "snmp")
+        return value
     except (SnmpTimeout, ValueError, socket.gaierror, OSError) as e:
         flog(f"[SNMP] {host}: get {oid} failed: {e}")
+        _note_failure(host, e)
         return None
@@ -1,7 +1,10 @@
 # adapters/snmp_toner.py
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Tuple
-from adapters.snmp_client import walk_oid
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from adapters.polling import OnError, log_failure, poll_many
+from adapters.snmp_client import walk_many
 
 SUPPLIES_TABLE_ROOT = "1.3.6.1.2.1.43.11.1.1"
 COLORANT_TABLE_VALUE = "1.3.6.1.2.1.43.12.1.1.4"
@@ -11,9 +14,14 @@ COL_CLASS, COL_TYPE, COL_DESC = "4", "5", "6"
 COL_UNIT, COL_MAX, COL_LVL = "7", "8", "9"
 
 PRT_SUPPLY_TYPE_TONER = {3, 5, 6, 10, 21}
+_TONER_MASK = sum(1 << v for v in PRT_SUPPLY_TYPE_TONER)
 PRT_SUPPLY_UNIT_PERCENT = 19
 NEG_UNKNOWN = {-1, -2, -3}
 
+# prtMarkerSuppliesEntry.<col>.<hrDeviceIndex>.<idx> / prtMarkerColorantValue.1.<marker>.<color>
+_SUPPLIES_RE = re.compile(r"(?:^|\.)43\.11\.1\.1\.(\d+)\.\d+\.(\d+)(?=\.|$)")
+_COLORANT_RE = re.compile(r"(?:^|\.)43\.12\.1\.1\.4\.1\.(\d+)\.(\d+)(?=\.|$)")
+
 def _to_text(val: Any) -> Optional[str]:
     if val is None:
         return None
@@ -33,30 +41,12 @@ def _to_text(val: Any) -> Optional[str]:
     return s
 
 def _parse_supplies_oid(oid: str) -> Optional[Tuple[str, int]]:
-    parts = oid.strip(".").split(".")
-    try:
-        for i in range(len(parts) - 5):
-            if parts[i:i+4] == ["43", "11", "1", "1"]:
-                col = parts[i+4]
-                idx = int(parts[i+6])
-                return col, idx
-    except Exception:
-        pass
-    return None
+    m = _SUPPLIES_RE.search(oid)
+    return (m.group(1), int(m.group(2))) if m else None
 
 def _parse_colorant_oid(oid: str) -> Optional[Tuple[int, int]]:
-    parts = oid.strip(".").split(".")
-    try:
-        for i in range(len(parts) - 6):
-            if parts[i:i+4] == ["43", "12", "1", "1"] and parts[i+4] == "4":
-                if parts[i+5] != "1":
-                    continue
-                marker = int(parts[i+6])
-                color = int(parts[i+7])
-                return marker, color
-    except Exception:
-        pass
-    return None
+    m = _COLORANT_RE.search(oid)
+    return (int(m.group(1)), int(m.group(2))) if m else None
 
 def _compute_percent(level: Optional[int], maxcap: Optional[int], unit: Optional[int]) -> Optional[int]:
     if level is None or level in NEG_UNKNOWN:
@@ -71,25 +61,29 @@ def _compute_percent(level: Optional[int], maxcap: Optional[int], unit: Optional
 def _pct_with_symbol(v: Optional[int]) -> Optional[str]:
     return None if v is None else f"{int(v)}%"
 
+# priority order: first listed wins when several names appear
+_COLOR_NAMES = ("black", "cyan", "magenta", "yellow", "gray", "grey",
+                "black", "yellow", "magenta", "cyan")
+_COLOR_RE = re.compile("|".join(f"({k})" for k in (
+    "black", "cyan", "magenta", "yellow", "gray", "grey",
+    "שחור", "צהוב", "מגנטה", "סיאן",
+)))
+
+@lru_cache(maxsize=1024)
 def _friendly_color(name: Optional[str], fallback_desc: Optional[str]) -> str:
     def pick(s: Optional[str]) -> Optional[str]:
         if not s:
             return None
         t = s.strip().lower()
-        for k in ("black", "cyan", "magenta", "yellow", "gray", "grey", "photo black"):
-            if k in t:
-                return k
-        he_map = {"שחור": "black", "צהוב": "yellow", "מגנטה": "magenta", "סיאן": "cyan"}
-        for he, en in he_map.items():
-            if he in t:
-                return en
-        return t
+        hits = {m.lastindex for m in _COLOR_RE.finditer(t)}
+        return _COLOR_NAMES[min(hits) - 1] if hits else t
     c = pick(name) or pick(fallback_desc) or "unknown"
     return c.title()
 
 def get_snmp_toner(ip: str, *, community: str, timeout: Optional[float]) -> Tuple[str, List[Dict[str, Optional[str]]]]:
+    walked = walk_many(ip, (SUPPLIES_TABLE_ROOT, COLORANT_TABLE_VALUE), community=community, timeout=timeout)
     rows: Dict[int, Dict[str, Any]] = {}
-    for oid, value in walk_oid(ip, SUPPLIES_TABLE_ROOT, community=community, timeout=timeout):
+    for oid, value in walked[SUPPLIES_TABLE_ROOT]:
         parsed = _parse_supplies_oid(oid)
         if not parsed:
             continue
@@ -101,24 +95,22 @@ def get_snmp_toner(ip: str, *, community: str, timeout: Optional[float]) -> Tupl
             except Exception:
                 row[col] = None
         elif col == COL_DESC:
-            row[col] = _to_text(value)
+            row[col] = value
 
     toner_rows: List[Tuple[int, Dict[str, Any]]] = []
     for idx, r in rows.items():
         t = r.get(COL_TYPE)
-        if isinstance(t, int) and t in PRT_SUPPLY_TYPE_TONER:
+        if isinstance(t, int) and 0 <= t < 64 and (_TONER_MASK >> t) & 1:
             toner_rows.append((idx, r))
 
+    # walk_many already logged a failed colorant walk; it just comes back empty
     color_map: Dict[Tuple[int, int], str] = {}
-    try:
-        for oid, value in walk_oid(ip, COLORANT_TABLE_VALUE, community=community, timeout=timeout):
-            key = _parse_colorant_oid(oid)
-            if not key:
-                continue
-            marker_idx, color_idx = key
-            color_map[(marker_idx, color_idx)] = _to_text(value) or ""
-    except Exception:
-        color_map = {}
+    for oid, value in walked[COLORANT_TABLE_VALUE]:
+        key = _parse_colorant_oid(oid)
+        if not key:
+            continue
+        marker_idx, color_idx = key
+        color_map[(marker_idx, color_idx)] = _to_text(value) or ""
 
     cartridges: List[Dict[str, Optional[str]]] = []
     for idx, r in sorted(toner_rows, key=lambda t: t[0]):
@@ -127,7 +119,7 @@ def get_snmp_toner(ip: str, *, community: str, timeout: Optional[float]) -> Tupl
         marker_idx = r.get(COL_MARKER_IDX) or 1
         color_idx = r.get(COL_COLOR_IDX) or 0
         colorant_name = color_map.get((marker_idx, color_idx), None)
-        desc = r.get(COL_DESC)
+        desc = _to_text(r.get(COL_DESC))
         entry = {
             "cartridge": _friendly_color(colorant_name, desc),
             "remaining_percent": _pct_with_symbol(percent_int),
@@ -136,3 +128,10 @@ def get_snmp_toner(ip: str, *, community: str, timeout: Optional[float]) -> Tupl
 
     status = "online" if cartridges is not None else "offline"
     return status, cartridges or []
+
+def get_snmp_toner_batch(ips: Iterable[str], *, community: str, timeout: Optional[float],
+                         on_error: Optional[OnError] = None,
+                         max_workers: int = 16) -> Dict[str, Tuple[str, List[Dict[str, Optional[str]]]]]:
+    """Poll many printers concurrently; a failed IP maps to on_error(ip, exc), by default ("offline", [])."""
+    return poll_many(get_snmp_toner, ips, community=community, timeout=timeout, max_workers=max_workers,
+                     on_error=on_error or log_failure(lambda: ("offline", [])))
@@ -1,16 +1,33 @@
 # adapters/toner_type_snmp.py
 from __future__ import annotations
 import re
-from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from adapters.polling import OnError, log_failure, poll_many
 from adapters.snmp_client import walk_oid
 
 SUPPLIES_TABLE_ROOT = "1.3.6.1.2.1.43.11.1.1"
 COL_CLASS, COL_TYPE, COL_DESC = "4", "5", "6"
 PRT_SUPPLY_TYPE_TONER = {3, 5, 6, 10, 21}
+_TONER_MASK = sum(1 << v for v in PRT_SUPPLY_TYPE_TONER)
 
-PAREN_CODE_RE = re.compile(r"\(([A-Z0-9\-]{3,})\)")
-AFTER_HP_CODE_RE = re.compile(r"\bHP\b\W*([A-Z0-9\-]{3,})", re.I)
+# one pass over a supply description: every alternative is a lookahead so a
+# token like "HP Black" still yields both the HP code and the color
+DESC_RE = re.compile(
+    r"(?=(?P<color>(?i:black|cyan|magenta|yellow)|שחור|ציאן|מג|צהוב)"
+    r"|\((?P<pcode>[A-Z0-9\-]{3,})\)"
+    r"|(?i:\bHP\b\W*(?P<hcode>[A-Z0-9\-]{3,})))"
+)
 GEN_CODE_RE = re.compile(r"\b([A-Z][A-Z0-9\-]{2,})\b")
+SUPPLIES_OID_RE = re.compile(r"(?:^|\.)43\.11\.1\.1\.(\d+)\.\d+\.(\d+)(?=\.|$)")
+
+@dataclass(slots=True)
+class SupplyRow:
+    cls: Optional[int] = None
+    typ: Optional[int] = None
+    desc: Any = None  # raw SNMP value, decoded only for toner rows
 
 def _to_text(val: Any) -> Optional[str]:
     if val is None:
@@ -28,80 +45,96 @@ def _to_text(val: Any) -> Optional[str]:
     return s
 
 def _parse_supplies_oid(oid: str) -> Optional[Tuple[str, int]]:
-    parts = oid.strip(".").split(".")
-    try:
-        for i in range(len(parts) - 5):
-            if parts[i:i+4] == ["43", "11", "1", "1"]:
-                return parts[i+4], int(parts[i+6])
-    except Exception:
-        return None
-    return None
+    m = SUPPLIES_OID_RE.search(oid)
+    return (m.group(1), int(m.group(2))) if m else None
 
-def _friendly_color_from_text(text: Optional[str]) -> Optional[str]:
-    if not text:
-        return None
-    t = text.lower()
-    if "black" in t or "שחור" in t:
-        return "Black"
-    if "cyan" in t or "ציאן" in t:
-        return "Cyan"
-    if "magenta" in t or "מג" in t:
-        return "Magenta"
-    if "yellow" in t or "צהוב" in t:
-        return "Yellow"
-    return None
+_COLOR_WORDS = {
+    "black": "Black", "שחור": "Black",
+    "cyan": "Cyan", "ציאן": "Cyan",
+    "magenta": "Magenta", "מג": "Magenta",
+    "yellow": "Yellow", "צהוב": "Yellow",
+}
+_COLOR_RANK = {"Black": 0, "Cyan": 1, "Magenta": 2, "Yellow": 3}
 
-def _extract_code(text: str) -> Optional[str]:
-    m = PAREN_CODE_RE.search(text)
-    if m:
-        return m.group(1)
-    m = AFTER_HP_CODE_RE.search(text)
-    if m:
-        token = m.group(1)
-        if not re.fullmatch(r"\d{3}V", token):
-            return token
-    matches = list(GEN_CODE_RE.finditer(text.upper()))
-    if matches:
-        return matches[-1].group(1)
-    return None
+@lru_cache(maxsize=1024)
+def _scan_desc(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return (color, code) for a supply description using a single DESC_RE scan."""
+    color: Optional[str] = None
+    pcode: Optional[str] = None
+    hcode: Optional[str] = None
+    for m in DESC_RE.finditer(text):
+        word = m.group("color")
+        if word is not None:
+            name = _COLOR_WORDS[word.lower()]
+            if color is None or _COLOR_RANK[name] < _COLOR_RANK[color]:
+                color = name
+        elif m.group("pcode") is not None:
+            if pcode is None:
+                pcode = m.group("pcode")
+        elif hcode is None:
+            hcode = m.group("hcode")
+    if pcode:
+        return color, pcode
+    if hcode and not re.fullmatch(r"\d{3}V", hcode):
+        return color, hcode
+    last = None
+    for last in GEN_CODE_RE.finditer(text.upper()):
+        pass
+    return color, (last.group(1) if last else None)
 
 def get_snmp_toner_types(ip: str, *, community: str, timeout: Optional[float]) -> List[str]:
-    rows: Dict[int, Dict[str, Any]] = {}
+    rows: Dict[int, SupplyRow] = {}
     for oid, value in walk_oid(ip, SUPPLIES_TABLE_ROOT, community=community, timeout=timeout):
         parsed = _parse_supplies_oid(oid)
         if not parsed:
             continue
         col, idx = parsed
-        row = rows.setdefault(idx, {})
-        if col in (COL_CLASS, COL_TYPE):
+        row = rows.get(idx)
+        if row is None:
+            row = rows[idx] = SupplyRow()
+        if col == COL_CLASS:
             try:
-                row[col] = int(value)
+                row.cls = int(value)
             except Exception:
-                row[col] = None
+                row.cls = None
+        elif col == COL_TYPE:
+            try:
+                row.typ = int(value)
+            except Exception:
+                row.typ = None
         elif col == COL_DESC:
-            row[col] = _to_text(value) or ""
+            row.desc = value
 
-    toner_rows: List[Tuple[int, Dict[str, Any]]] = []
+    toner_rows: List[Tuple[int, SupplyRow]] = []
     for idx, r in rows.items():
-        t = r.get(COL_TYPE)
-        if isinstance(t, int) and t in PRT_SUPPLY_TYPE_TONER:
+        t = r.typ
+        if isinstance(t, int) and 0 <= t < 64 and (_TONER_MASK >> t) & 1:
             toner_rows.append((idx, r))
 
-    color_order = {"Black": 0, "Cyan": 1, "Magenta": 2, "Yellow": 3}
-    pairs: List[Tuple[str, str]] = []
+    # (sort key, code) with the key computed once per pair
+    pairs: List[Tuple[Tuple[int, str], str]] = []
     seen = set()
 
-    for idx, r in sorted(toner_rows, key=lambda t: t[0]):
-        desc = r.get(COL_DESC) or ""
+    for idx, r in sorted(toner_rows, key=itemgetter(0)):
+        raw = r.desc
+        # most non-HP rows can be dropped without decoding them at all
+        if isinstance(raw, (bytes, bytearray)) and b"hp" not in raw.lower():
+            continue
+        desc = _to_text(raw) or ""
         if not desc or "hp" not in desc.lower():
             continue
-        color = _friendly_color_from_text(desc)
-        code = _extract_code(desc)
+        color, code = _scan_desc(desc)
         if color and code:
             key = (color, code)
             if key not in seen:
                 seen.add(key)
-                pairs.append(key)
+                pairs.append(((_COLOR_RANK.get(color, 99), code), code))
 
-    pairs.sort(key=lambda p: (color_order.get(p[0], 99), p[1]))
+    pairs.sort(key=itemgetter(0))
     return [code for _, code in pairs]
+
+def get_snmp_toner_types_batch(ips: Iterable[str], *, community: str, timeout: Optional[float],
+                               on_error: Optional[OnError] = None, max_workers: int = 16) -> Dict[str, List[str]]:
+    """Query many printers concurrently; a failed IP maps to on_error(ip, exc), by default []."""
+    return poll_many(get_snmp_toner_types, ips, community=community, timeout=timeout, max_workers=max_workers,
+                     on_error=on_error or log_failure(list))
@@ -1,12 +1,31 @@
 # adapters/toner_type_web.py
 from __future__ import annotations
 import json, re
-from typing import Any, Optional
-from bs4 import BeautifulSoup
-from adapters.http_legacy import make_legacy_session
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import requests
+from adapters.http_legacy import split_timeout, thread_legacy_session
+from adapters.polling import OnError, log_failure, poll_many
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+try:
+    import json5  # type: ignore
+except ImportError:
+    json5 = None
+try:
+    import re2 as _re_engine  # type: ignore  # linear-time matching when available
+except ImportError:
+    _re_engine = re
 
 _TONER_PATTERNS = [r"W\d{4}[A-Z](?:X)?", r"MLT-[A-Z]\d{3,5}[A-Z]*", r"[A-Z]{2}\d{3}[A-Z]"]
-TONER_ID_RE = re.compile(r"(?:%s)" % "|".join(_TONER_PATTERNS))
+TONER_ID_RE = _re_engine.compile(r"(?:%s)" % "|".join(_TONER_PATTERNS))
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.I | re.S)
+# only real markup (<tag, </tag, <!--, <?xml); a stray "<" in text is left alone
+_TAG_RE = re.compile(r"<[A-Za-z/!?][^>]*>")
+_JSON_REPAIR_RE = re.compile(r'([{\[,]\s*)([A-Za-z_][A-Za-z0-9_]*)(\s*):')
 SUPPLIES_PATHS = (
     "/sws/app/information/supplies/supplies.json",
     "/sws/app/information/supplies/supply.json",
@@ -14,86 +33,169 @@ SUPPLIES_PATHS = (
 )
 
 def _parse_json_text(text: str) -> Any:
-    try:
-        return json.loads(text)
-    except Exception:
+    if orjson is not None:
         try:
-            import json5  # type: ignore
-            return json5.loads(text)
+            return orjson.loads(text)
         except Exception:
             pass
-    fixed = re.sub(r'([{\[,]\s*)([A-Za-z_][A-Za-z0-9_]*)(\s*):', r'\1"\2"\3:', text)
+    try:
+        return json.loads(text)
+    except Exception:
+        if json5 is not None:
+            try:
+                return json5.loads(text)
+            except Exception:
+                pass
+    fixed = _JSON_REPAIR_RE.sub(r'\1"\2"\3:', text)
     return json.loads(fixed)
 
+_ID_KEYS = frozenset(("id", "model", "name", "partno", "part_no", "pn"))
+_IGNORED_KEYS = frozenset(("date", "time", "serial", "serialno", "serial_no", "sn"))
+
+class _FoundToner(Exception):
+    def __init__(self, value: str):
+        self.value = value
+
 def _extract_toner_from_supplies_json(obj: Any) -> str:
     candidates = []
-    def walk(v: Any, ctx: str = ""):
-        if isinstance(v, dict):
-            for k, vv in v.items():
-                k_low = str(k).lower()
-                new_ctx = (ctx + " " + k_low).strip()
-                if isinstance(vv, (str, int)):
-                    s = str(vv).strip()
-                    if ("toner" in new_ctx or "suppl" in new_ctx or k_low in ("id","model","name","partno","part_no","pn")):
-                        m = TONER_ID_RE.search(s)
-                        if m:
-                            candidates.append(m.group(0))
-                walk(vv, new_ctx)
-        elif isinstance(v, list):
-            for it in v:
-                walk(it, ctx)
-        elif isinstance(v, str):
-            m = TONER_ID_RE.search(v)
-            if m:
-                candidates.append(m.group(0))
-    walk(obj, "")
-    for c in candidates:
-        if c.startswith("W"):
-            return c
+    def hit(s: str):
+        m = TONER_ID_RE.search(s)
+        if m:
+            c = m.group(0)
+            if c.startswith("W"):
+                raise _FoundToner(c)
+            candidates.append(c)
+    # explicit pre-order stack of (value, in toner/supply context, parent key)
+    stack: List[Tuple[Any, bool, Optional[str]]] = [(obj, False, None)]
+    try:
+        while stack:
+            v, in_ctx, k_low = stack.pop()
+            if k_low is not None:
+                if k_low in _IGNORED_KEYS and not in_ctx:
+                    continue
+                if isinstance(v, (str, int)) and (in_ctx or k_low in _ID_KEYS):
+                    hit(str(v).strip())
+            if isinstance(v, dict):
+                kids = []
+                for k, vv in v.items():
+                    kl = str(k).lower()
+                    kids.append((vv, in_ctx or "toner" in kl or "suppl" in kl, kl))
+                stack.extend(reversed(kids))
+            elif isinstance(v, list):
+                stack.extend((it, in_ctx, None) for it in reversed(v))
+            elif isinstance(v, str):
+                hit(v)
+    except _FoundToner as f:
+        return f.value
     return candidates[0] if candidates else ""
 
 def _extract_toner_from_html(html: str) -> str:
     if not html:
         return ""
-    soup = BeautifulSoup(html, "html.parser")
-    text = soup.get_text(" ", strip=True)
-    m = TONER_ID_RE.search(text or "")
+    # only the visible text matters: drop scripts/styles and tags, no DOM needed
+    m = TONER_ID_RE.search(_TAG_RE.sub(" ", _SCRIPT_STYLE_RE.sub(" ", html)))
     return m.group(0) if m else ""
 
-def get_ews_toner_type(ip: str, *, timeout: Optional[float]) -> str:
-    s = make_legacy_session(timeout=timeout or 12.0)
-    for scheme in ("https://", "http://"):
-        base = f"{scheme}{ip}"
+HTML_PATHS = (
+    "/sws/app/information/supplies/supplies.html",
+    "/sws/app/information/status/supplies.html",
+    "/sws/index.html",
+)
+
+class _Unauthorized(Exception):
+    pass
+
+def _get(s: requests.Session, url: str, timeout: float) -> requests.Response:
+    r = s.get(url, verify=False, timeout=split_timeout(timeout))
+    if r.status_code in (401, 403):
+        raise _Unauthorized(url)
+    return r
+
+def _toner_from_supplies_url(s: requests.Session, url: str, timeout: float) -> str:
+    r = _get(s, url, timeout)
+    if r.status_code == 200 and r.text and ("{" in r.text or "[" in r.text):
         try:
-            s.get(f"{base}/sws/index.html", verify=False, timeout=timeout or 12.0)
+            data = _parse_json_text(r.text)
         except Exception:
-            pass
-        for path in SUPPLIES_PATHS:
-            try:
-                r = s.get(base + path, verify=False, timeout=timeout or 12.0)
-                if r.status_code == 200 and r.text and ("{" in r.text or "[" in r.text):
-                    try:
-                        data = _parse_json_text(r.text)
-                    except Exception:
-                        data = None
-                    if data is not None:
-                        tid = _extract_toner_from_supplies_json(data)
-                        if tid:
-                            return tid
-                    m = TONER_ID_RE.search(r.text)
-                    if m:
-                        return m.group(0)
-            except Exception:
-                continue
-        for html_path in ("/sws/app/information/supplies/supplies.html",
-                          "/sws/app/information/status/supplies.html",
-                          "/sws/index.html"):
+            data = None
+        if data is not None:
+            tid = _extract_toner_from_supplies_json(data)
+            if tid:
+                return tid
+        m = TONER_ID_RE.search(r.text)
+        if m:
+            return m.group(0)
+    return ""
+
+def _toner_from_html_url(s: requests.Session, url: str, timeout: float) -> str:
+    r = _get(s, url, timeout)
+    if r.status_code == 200 and r.text:
+        return _extract_toner_from_html(r.text)
+    return ""
+
+# shared across printers so concurrent scans can't open an unbounded number of probes
+_PROBE_POOL = ThreadPoolExecutor(max_workers=48, thread_name_prefix="ews-probe")
+
+def _first_hit(fn, s: requests.Session, urls: List[str], timeout: float) -> Tuple[str, bool]:
+    """
+    Fire all probes at once and return (first hit in path order, any probe got 401/403).
+    Raises the connection error when no probe could connect at all.
+    """
+    futures = [_PROBE_POOL.submit(fn, s, u, timeout) for u in urls]
+    errors: List[Exception] = []
+    try:
+        for fut in futures:
             try:
-                r = s.get(base + html_path, verify=False, timeout=timeout or 12.0)
-                if r.status_code == 200 and r.text:
-                    tid = _extract_toner_from_html(r.text)
-                    if tid:
-                        return tid
-            except Exception:
+                tid = fut.result()
+            except Exception as e:
+                errors.append(e)
                 continue
+            if tid:
+                return tid, False
+    finally:
+        for fut in futures:
+            fut.cancel()
+    if len(errors) == len(futures) and all(isinstance(e, requests.exceptions.ConnectionError) for e in errors):
+        raise errors[0]
+    return "", any(isinstance(e, _Unauthorized) for e in errors)
+
+def _probe_base(s: requests.Session, base: str, timeout: float) -> Tuple[str, bool]:
+    tid, denied = _first_hit(_toner_from_supplies_url, s, [base + p for p in SUPPLIES_PATHS], timeout)
+    if tid:
+        return tid, False
+    try:
+        tid, denied_html = _first_hit(_toner_from_html_url, s, [base + p for p in HTML_PATHS], timeout)
+    except requests.exceptions.ConnectionError:
+        tid, denied_html = "", False
+    return tid, denied or denied_html
+
+def get_ews_toner_type(ip: str, *, timeout: Optional[float],
+                       session: Optional[requests.Session] = None) -> str:
+    t = timeout or 12.0
+    s = session or thread_legacy_session(t)
+    for scheme in ("https://", "http://"):
+        base = f"{scheme}{ip}"
+        try:
+            tid, denied = _probe_base(s, base, t)
+            if not tid and denied:
+                # some SWS builds only serve supplies once the landing page set a session cookie
+                s.get(f"{base}/sws/index.html", verify=False, timeout=split_timeout(t))
+                tid, _ = _probe_base(s, base, t)
+        except requests.exceptions.ConnectTimeout:
+            # host unreachable, not a TLS problem: http won't do better
+            return ""
+        except requests.exceptions.ConnectionError:
+            # TLS failure or refused: try the next scheme
+            continue
+        except Exception:
+            return ""
+        # the device answered on this scheme (even 4xx/read timeout): the http pass
+        # would only repeat the same misses
+        return tid
     return ""
+
+def get_ews_toner_type_batch(ips: Iterable[str], *, timeout: Optional[float],
+                             on_error: Optional[OnError] = None, max_workers: int = 32) -> Dict[str, str]:
+    """Probe many printers concurrently; a failed IP maps to on_error(ip, exc), by default ""."""
+    return poll_many(get_ews_toner_type, ips, timeout=timeout, max_workers=max_workers,
+                     on_error=on_error or log_failure(str))
@@ -30,14 +30,18 @@ def run_pipeline(args, cfg: AppConfig) -> int:
             cprint(f"[WARN] {w}")
             flog(w)
 
+        labels = step_labels_from_plan(plan)
+
         # If user asked for menu – only show, then exit
         if args.menu:
-            print_menu(plan, exclude_steps, exclude_subs)
+            print_menu(plan, exclude_steps, exclude_subs, labels=labels)
             print_param_menu(args, cfg, exclude_steps, exclude_subs)
             flog("Menu displayed; exiting by request.")
             return 0
 
-        labels = step_labels_from_plan(plan)
+        for it in plan:
+            if it.step not in labels:
+                labels[it.step] = it.title.split(":", 1)[1].strip() if ":" in it.title else it.path.stem
         current_major = None
         results = []
 
@@ -45,11 +49,7 @@ def run_pipeline(args, cfg: AppConfig) -> int:
             # announce each major step once
             if current_major != it.step:
                 current_major = it.step
-                label = labels.get(
-                    it.step,
-                    it.title.split(":", 1)[1].strip() if ":" in it.title else it.path.stem,
-                )
-                cprint(f"Step {it.step}: {label} ...")
+                cprint(f"Step {it.step}: {labels[it.step]} ...")
 
             # meta items are headings only
             if it.substep == 0:
@@ -3,6 +3,12 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
+from typing import List, Optional
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
 
 from settings.config import AppConfig
 from settings.logging_setup import setup_logging
@@ -10,17 +16,27 @@ from adapters.excel_io import resolve_xlsm, open_workbook, save_workbook, backup
 from core.excel.update_from_json import build_id_map, update_sheet, update_branches_grouped
 from core.enrich.employees import build_employees_index
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Update printers XLSM from printers.json")
     p.add_argument("--json", help="path to printers.json (defaults to config)")
     p.add_argument("--xlsm", help="path to printers.xlsm (defaults to config)")
     p.add_argument("--employees-json", help="optional employeesData.json (defaults to data/employeesData.json)")
     p.add_argument("-u","--update", action="store_true", default=True, help="overwrite the XLSM in-place")
     p.add_argument("-l","--log", action="store_true", default=True, help="save a backup copy in logs/printerExcel")
-    return p.parse_args()
+    return p.parse_args(argv)
+
+def _load_json(path: Path):
+    if orjson is not None:
+        try:
+            return orjson.loads(path.read_bytes())
+        except orjson.JSONDecodeError:
+            # NaN/Infinity from an earlier stdlib json.dumps: only the stdlib parser reads them
+            pass
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
 
-def main() -> None:
-    args = parse_args()
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
     cfg = AppConfig.load()
     setup_logging(cfg.logs_dir, enable_logs=True)
 
@@ -32,8 +48,7 @@ def main() -> None:
         else (cfg.data_dir / "employeesData.json")
     )
 
-    with json_path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = _load_json(json_path)
 
     id_map = build_id_map(data)
 
@@ -43,8 +58,7 @@ def main() -> None:
         total_updates += update_sheet(ws, id_map)
 
     if employees_json.exists():
-        with employees_json.open("r", encoding="utf-8") as ef:
-            employees_data = json.load(ef)
+        employees_data = _load_json(employees_json)
         employees_index = build_employees_index(employees_data)
         if "Branches_Grouped" in wb.sheetnames:
             ws_bg = wb["Branches_Grouped"]
@@ -60,5 +74,10 @@ def main() -> None:
 
     print(f"Updated rows: {total_updates}")
 
+def run(argv: List[str]) -> int:
+    """In-process entry used by the pipeline's script runner."""
+    main(argv)
+    return 0
+
 if __name__ == "__main__":
     main()
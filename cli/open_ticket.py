@@ -25,6 +25,16 @@ def _choose(items: List[Dict[str, Any]]) -> Dict[str, Any] | None:
             if 1 <= i <= len(items):
                 return items[i-1]
 
+def _arity(fn) -> int:
+    # positional parameter count straight off the code object; only
+    # non-function callables pay for inspect.signature
+    code = getattr(fn, "__code__", None)
+    if code is not None:
+        n = code.co_argcount + (1 if code.co_flags & inspect.CO_VARARGS else 0)
+        # a bound method's code still counts self, which signature() leaves out
+        return n - 1 if inspect.ismethod(fn) else n
+    return len(inspect.signature(fn).parameters)
+
 def main(argv=None) -> int:
     p = argparse.ArgumentParser(add_help=True)
     p.add_argument("--printers-json", help="Path to printers.json (defaults to AppConfig)")
@@ -48,19 +58,6 @@ def main(argv=None) -> int:
         sys.stderr.write(f"Failed to read printers JSON: {e}\n")
         return 2
 
-    try:
-        plugin = load_plugin(args.plugin)
-    except Exception as e:
-        sys.stderr.write(f"Error: could not import plugin '{args.plugin}': {e}\n")
-        return 2
-
-    required = ("prepare", "search", "extract", "make_subject", "make_html")
-    if not all(hasattr(plugin, fn) for fn in required):
-        sys.stderr.write("Error: plugin must define prepare(), search(), extract(), make_subject(), make_html().\n")
-        return 2
-
-    spec = plugin.prepare()
-
     print("\nSelect group:")
     print("1) Company")
     print("2) Branches")
@@ -80,6 +77,27 @@ def main(argv=None) -> int:
         sys.stderr.write(f"Error: JSON has no {group_key} entries.\n")
         return 2
 
+    # import the plugin only once we know the user is going to search
+    try:
+        plugin = load_plugin(args.plugin)
+    except Exception as e:
+        sys.stderr.write(f"Error: could not import plugin '{args.plugin}': {e}\n")
+        return 2
+
+    try:
+        prepare, search, extract, make_subject, make_html = (
+            plugin.prepare, plugin.search, plugin.extract, plugin.make_subject, plugin.make_html,
+        )
+    except AttributeError:
+        sys.stderr.write("Error: plugin must define prepare(), search(), extract(), make_subject(), make_html().\n")
+        return 2
+    collect = getattr(plugin, "collect", None)
+    # older plugins take no group_key; resolve arity once, not per query
+    search_arity = _arity(search)
+    extract_arity = _arity(extract)
+
+    spec = prepare()
+
     fields = spec.get("search_fields", [])
     if group_key == "Company_Grouped":
         fields = [f for f in fields if f.get("key","").lower() != "id"]
@@ -104,11 +122,10 @@ def main(argv=None) -> int:
             if not value:
                 break
 
-            sig = inspect.signature(plugin.search)
-            if len(sig.parameters) >= 4:
-                results = plugin.search(printers, key_for_plugin, value, group_key)
+            if search_arity >= 4:
+                results = search(printers, key_for_plugin, value, group_key)
             else:
-                results = plugin.search(printers, key_for_plugin, value)
+                results = search(printers, key_for_plugin, value)
 
             if not results:
                 print("No info found for that value. Try again.")
@@ -122,18 +139,17 @@ def main(argv=None) -> int:
             else:
                 entry = results[0]
 
-            sig = inspect.signature(plugin.extract)
-            if len(sig.parameters) >= 2:
-                data = plugin.extract(entry, group_key)
+            if extract_arity >= 2:
+                data = extract(entry, group_key)
             else:
-                data = plugin.extract(entry)
+                data = extract(entry)
 
-            if hasattr(plugin, "collect"):
-                data = plugin.collect(spec, data)
+            if collect is not None:
+                data = collect(spec, data)
 
             to_addr = spec.get("to", "sysmoked@one1.co.il")
-            subject = plugin.make_subject(data)
-            html_body = plugin.make_html(data, to_addr)
+            subject = make_subject(data)
+            html_body = make_html(data, to_addr)
 
             if send_via_outlook(to_addr, subject, html_body):
                 print("Draft opened in Outlook. You must send manually.")
@@ -101,10 +101,8 @@ def apply_locations(printers: Dict[str, Any], rows: List[Dict[str, Any]]) -> Dic
             si["firstDescription"] = _make_desc(order[0])
         if len(order) >= 2:
             si["secondDescription"] = _make_desc(order[1])
-        if "firstDisc" in si:
-            del si["firstDisc"]
-        if "secondDisc" in si:
-            del si["secondDisc"]
+        si.pop("firstDisc", None)
+        si.pop("secondDisc", None)
         obj["storeInfo"] = si
         branches[i] = obj
     printers[key] = branches
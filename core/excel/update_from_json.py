@@ -78,14 +78,13 @@ def extract_info(prn: Dict[str, Any]) -> Dict[str, Any]:
     # same as old script
     info = {"Status": None, "Black": None, "Cyan": None, "Magenta": None, "Yellow": None, "Error": None, "Severity": None, "Toner Type": None}
     pinfo = prn.get("printerInfo") or {}
+    carts = pinfo.get("cartridges") or []
     status_val = pinfo.get("status")
     if status_val is None:
-        carts = pinfo.get("cartridges") or []
         if carts and isinstance(carts, list):
             first = carts[0] or {}
             status_val = first.get("status")
     info["Status"] = _status_online_offline(status_val)
-    carts = pinfo.get("cartridges") or []
     for cart in carts:
         try:
             cname = normalize_color(cart.get("cartridge"))
@@ -143,6 +142,7 @@ def find_header_row_and_map(ws) -> tuple[Optional[int], Dict[str, int]]:
     for r in range(1, max_scan_rows + 1):
         row_map: Dict[str, int] = {}
         score = 0
+        has_id = False
         for c in range(1, ws.max_column + 1):
             v = ws.cell(r, c).value
             if v is None:
@@ -151,9 +151,11 @@ def find_header_row_and_map(ws) -> tuple[Optional[int], Dict[str, int]]:
             if not name:
                 continue
             row_map[name] = c
-            if name.strip().lower() in expected:
+            low = name.lower()
+            has_id = has_id or low == "id"
+            if low in expected:
                 score += 1
-        if "id" in {k.strip().lower() for k in row_map} and score > best_score:
+        if has_id and score > best_score:
             best_row = r
             best_score = score
             best_map = row_map
@@ -194,6 +196,7 @@ def update_sheet(ws, id_map: Dict[str, Dict[str, Any]]) -> int:
     id_col = lower_map.get("id")
     if not id_col:
         return 0
+    targets = [(name, lower_map[name.lower()]) for name in required_cols if lower_map.get(name.lower())]
     updates = 0
     for r in range(header_row + 1, ws.max_row + 1):
         rid_val = ws.cell(r, id_col).value
@@ -203,10 +206,7 @@ def update_sheet(ws, id_map: Dict[str, Dict[str, Any]]) -> int:
         info = id_map.get(cid)
         if not info:
             continue
-        for name in required_cols:
-            col_idx = lower_map.get(name.strip().lower())
-            if not col_idx:
-                continue
+        for name, col_idx in targets:
             ws.cell(r, col_idx, sanitize_excel_value(dash_if_blank(info.get(name))))
         updates += 1
     return updates
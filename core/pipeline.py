@@ -10,6 +10,7 @@ from settings.config import AppConfig
 
 # match your component scripts: don't grab files that start with "_"
 _PY_FILE = re.compile(r"^[^_].*\.py$", re.IGNORECASE)
+_NATURAL_RE = re.compile(r"(\d+)")
 
 
 @dataclass
@@ -22,7 +23,7 @@ class PlanItem:
 
 
 def _natural_key(name: str):
-    parts = re.split(r"(\d+)", name.lower())
+    parts = _NATURAL_RE.split(name.lower())
     return tuple(int(p) if p.isdigit() else p for p in parts)
 
 
@@ -1,8 +1,9 @@
 from __future__ import annotations
 import json
-import logging
+from typing import List, Optional
 from pathlib import Path
 from settings.arguments import build_plugin_parser
+from settings.logging_setup import set_step_log_level
 from plugins.base import load_context_from_args, save_context
 from adapters.employee_source import read_employees_xlsx
 from core.enrich.employees import apply_employees
@@ -20,11 +21,11 @@ def _employees_xlsx_path() -> Path:
         pass
     return _project_root() / "data" / "EmployeesData.xlsx"
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     ap = build_plugin_parser("Enrich printers.json with Employees data")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
     ctx, log_cm = load_context_from_args(args, "adds_employee")
-    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+    set_step_log_level(args.debug)
     with log_cm:
         src = _employees_xlsx_path()
         rows = read_employees_xlsx(src)
@@ -42,5 +43,9 @@ def main() -> int:
         print(f"saved: {ctx.json_path}")
     return 0
 
+def run(argv: List[str]) -> int:
+    """In-process entry used by the pipeline's script runner."""
+    return main(argv)
+
 if __name__ == "__main__":
     raise SystemExit(main())
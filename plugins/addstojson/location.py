@@ -1,8 +1,9 @@
 from __future__ import annotations
 import json
-import logging
+from typing import List, Optional
 from pathlib import Path
 from settings.arguments import build_plugin_parser
+from settings.logging_setup import set_step_log_level
 from plugins.base import load_context_from_args, save_context
 from adapters.location_source import read_locations_xlsx
 from core.enrich.locations import apply_locations
@@ -22,11 +23,11 @@ def _locations_xlsx_path() -> Path:
         pass
     return Path(DEFAULT_LOCATIONS_XLSX)
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     ap = build_plugin_parser("Enrich printers.json with Location data")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
     ctx, log_cm = load_context_from_args(args, "adds_location")
-    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+    set_step_log_level(args.debug)
     with log_cm:
         src = _locations_xlsx_path()
         rows = read_locations_xlsx(src)
@@ -44,5 +45,9 @@ def main() -> int:
         print(f"saved: {ctx.json_path}")
     return 0
 
+def run(argv: List[str]) -> int:
+    """In-process entry used by the pipeline's script runner."""
+    return main(argv)
+
 if __name__ == "__main__":
     raise SystemExit(main())
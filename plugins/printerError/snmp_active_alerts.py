@@ -1,10 +1,11 @@
 from __future__ import annotations
 import logging
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 from settings.arguments import build_plugin_parser
+from settings.logging_setup import set_step_log_level
 from plugins.base import load_context_from_args, save_context
 from core.printers import iter_printers, ensure_printer_info, norm_ip, is_good_ip, matches_type
-from adapters.snmp_alerts import process_snmp_alerts
+from adapters.snmp_alerts import process_snmp_alerts, process_snmp_alerts_batch
 
 LOG = logging.getLogger("snmp_active_alerts")
 
@@ -27,13 +28,13 @@ def _process_one_printer(prn: Dict[str, Any], *, community: str, timeout: Option
         return "Normal", "informational"
     return process_snmp_alerts(ip, community=community, timeout=timeout)
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     ap = build_plugin_parser("Enrich printers.json with SNMP active alerts")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
     ctx, log_cm = load_context_from_args(args, "snmp_active_alerts")
     community = args.community or ctx.cfg.snmp_default_community
     timeout = args.timeout or ctx.cfg.http_default_timeout
-    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+    set_step_log_level(args.debug)
     processed = 0
     selected = 0
     found_only_ip = False
@@ -63,26 +64,39 @@ def main() -> int:
                 except Exception as e:
                     LOG.warning("[synthetic %s] error: %s", args.only_ip, e)
         else:
+            picked: List[Tuple[Dict[str, Any], str]] = []
             for prn in printers:
                 ip = norm_ip(prn)
                 if not is_good_ip(ip):
                     continue
                 if not matches_type(prn, TARGET_TYPES_LC):
                     continue
-                selected += 1
-                try:
-                    problem, sev = _process_one_printer(prn, community=community, timeout=timeout)
-                    info = ensure_printer_info(prn)
-                    info["printerError"] = {"problem": problem, "severity": sev}
-                    processed += 1
-                    LOG.debug("[%s] %s (%s)", ip, problem, sev)
-                except Exception as e:
-                    info = ensure_printer_info(prn)
-                    info["printerError"] = {"problem": "Offline", "severity": "critical"}
-                    LOG.warning("[%s] error: %s", ip, e)
+                picked.append((prn, ip))
+            selected = len(picked)
+            failed: Set[str] = set()
+
+            def _on_error(ip: str, e: Exception) -> Tuple[str, str]:
+                failed.add(ip)
+                LOG.warning("[%s] error: %s", ip, e)
+                return ("Offline", "critical")
+
+            results = process_snmp_alerts_batch((ip for _, ip in picked), community=community,
+                                                timeout=timeout, on_error=_on_error)
+            for prn, ip in picked:
+                problem, sev = results[ip]
+                info = ensure_printer_info(prn)
+                info["printerError"] = {"problem": problem, "severity": sev}
+                if ip in failed:
+                    continue
+                processed += 1
+                LOG.debug("[%s] %s (%s)", ip, problem, sev)
         LOG.info("snmp_active_alerts: selected=%s processed=%s", selected, processed)
     save_context(ctx)
     return 0
 
+def run(argv: List[str]) -> int:
+    """In-process entry used by the pipeline's script runner."""
+    return main(argv)
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -1,11 +1,12 @@
 # plugins/tonerFinder/toner_brother.py
 from __future__ import annotations
 import logging
-from typing import Any, Dict, Optional, Tuple, List
+from typing import Any, Dict, Optional, Set, Tuple, List
 from settings.arguments import build_plugin_parser
+from settings.logging_setup import set_step_log_level
 from plugins.base import load_context_from_args, save_context
 from core.printers import iter_printers, ensure_printer_info, norm_ip, is_good_ip, matches_type
-from adapters.brother_toner_web import get_brother_toner
+from adapters.brother_toner_web import get_brother_toner, get_brother_toner_batch
 
 LOG = logging.getLogger("toner_brother")
 
@@ -21,12 +22,12 @@ def _process_one_printer(prn: Dict[str, Any], *, timeout: Optional[float]) -> Tu
         return "offline", []
     return get_brother_toner(ip, timeout=timeout or 5.0)
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     ap = build_plugin_parser("Enrich printers.json with Brother toner levels over HTTP")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
     ctx, log_cm = load_context_from_args(args, "toner_brother")
     timeout = args.timeout or ctx.cfg.http_default_timeout
-    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+    set_step_log_level(args.debug)
     processed = 0
     selected = 0
     found_only_ip = False
@@ -58,28 +59,40 @@ def main() -> int:
                 except Exception as e:
                     LOG.warning("[synthetic %s] error: %s", args.only_ip, e)
         else:
+            picked: List[Tuple[Dict[str, Any], str]] = []
             for prn in printers:
                 ip = norm_ip(prn)
                 if not is_good_ip(ip):
                     continue
                 if not matches_type(prn, TARGET_TYPES_LC):
                     continue
-                selected += 1
-                try:
-                    status, carts = _process_one_printer(prn, timeout=timeout)
-                    info = ensure_printer_info(prn)
-                    info["status"] = status
-                    info["cartridges"] = carts
-                    processed += 1
-                    LOG.debug("[%s] %s carts=%d", ip, status, len(carts))
-                except Exception as e:
-                    info = ensure_printer_info(prn)
-                    info["status"] = "offline"
-                    info["cartridges"] = []
-                    LOG.warning("[%s] error: %s", ip, e)
+                picked.append((prn, ip))
+            selected = len(picked)
+            failed: Set[str] = set()
+
+            def _on_error(ip: str, e: Exception) -> Tuple[str, List[Dict[str, Optional[str]]]]:
+                failed.add(ip)
+                LOG.warning("[%s] error: %s", ip, e)
+                return "offline", []
+
+            results = get_brother_toner_batch((ip for _, ip in picked), timeout=timeout or 5.0,
+                                              on_error=_on_error)
+            for prn, ip in picked:
+                status, carts = results[ip]
+                info = ensure_printer_info(prn)
+                info["status"] = status
+                info["cartridges"] = carts
+                if ip in failed:
+                    continue
+                processed += 1
+                LOG.debug("[%s] %s carts=%d", ip, status, len(carts))
         LOG.info("toner_brother: selected=%s processed=%s", selected, processed)
     save_context(ctx)
     return 0
 
+def run(argv: List[str]) -> int:
+    """In-process entry used by the pipeline's script runner."""
+    return main(argv)
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -3,9 +3,10 @@ from __future__ import annotations
 import logging
 from typing import Any, Dict, List, Optional
 from settings.arguments import build_plugin_parser
+from settings.logging_setup import set_step_log_level
 from plugins.base import load_context_from_args, save_context
 from core.printers import iter_printers, ensure_printer_info, norm_ip, is_good_ip, matches_type
-from adapters.toner_type_snmp import get_snmp_toner_types
+from adapters.toner_type_snmp import get_snmp_toner_types, get_snmp_toner_types_batch
 
 LOG = logging.getLogger("toner_type_snmp")
 
@@ -21,13 +22,13 @@ def _process_one(ip: str, *, community: str, timeout: Optional[float]) -> List[s
         return []
     return get_snmp_toner_types(ip, community=community, timeout=timeout)
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     ap = build_plugin_parser("Enrich printers.json with toner type via SNMP")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
     ctx, log_cm = load_context_from_args(args, "toner_type_snmp")
     community = args.community or ctx.cfg.snmp_default_community
     timeout = args.timeout or ctx.cfg.http_default_timeout
-    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+    set_step_log_level(args.debug)
 
     processed = 0
     selected = 0
@@ -59,6 +60,8 @@ def main() -> int:
                     LOG.warning("[synthetic %s] error: %s", args.only_ip, e)
         else:
             by_type: Dict[str, List[Dict[str, Any]]] = {}
+            rep_ip_by_type: Dict[str, str] = {}
+            preset_by_type: Dict[str, List[str]] = {}
             for prn in printers:
                 ip = norm_ip(prn)
                 if not is_good_ip(ip):
@@ -66,28 +69,27 @@ def main() -> int:
                 if not matches_type(prn, TARGET_TYPES_LC):
                     continue
                 t = str(prn.get("Type") or "").strip()
-                by_type.setdefault(t, []).append(prn)
+                items = by_type.get(t)
+                if items is None:
+                    items = by_type[t] = []
+                    rep_ip_by_type[t] = ip
+                items.append(prn)
+                if t not in preset_by_type:
+                    tt0 = (prn.get("printerInfo") or {}).get("tonerType")
+                    if isinstance(tt0, list) and tt0:
+                        preset_by_type[t] = list(tt0)
+            # probe one printer per type concurrently; write back on this thread
+            probe_ips = [rep_ip_by_type[t] for t in by_type if t not in preset_by_type]
+
+            def _on_error(rep_ip: str, e: Exception) -> List[str]:
+                LOG.warning("[%s] error: %s", rep_ip, e)
+                return []
+
+            probed = get_snmp_toner_types_batch(probe_ips, community=community, timeout=timeout,
+                                                on_error=_on_error)
             for t, items in by_type.items():
                 selected += len(items)
-                preset: List[str] = []
-                for it in items:
-                    pi0 = it.get("printerInfo") or {}
-                    tt0 = pi0.get("tonerType")
-                    if isinstance(tt0, list) and tt0:
-                        preset = list(tt0)
-                        break
-                if not preset:
-                    rep_ip = None
-                    for it in items:
-                        ip = norm_ip(it)
-                        if is_good_ip(ip):
-                            rep_ip = ip
-                            break
-                    if rep_ip:
-                        try:
-                            preset = _process_one(rep_ip, community=community, timeout=timeout)
-                        except Exception as e:
-                            LOG.warning("[%s] error: %s", rep_ip, e)
+                preset: List[str] = preset_by_type.get(t) or probed.get(rep_ip_by_type[t]) or []
                 for it in items:
                     info = ensure_printer_info(it)
                     info["tonerType"] = list(preset)
@@ -96,5 +98,9 @@ def main() -> int:
     save_context(ctx)
     return 0
 
+def run(argv: List[str]) -> int:
+    """In-process entry used by the pipeline's script runner."""
+    return main(argv)
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -1,32 +1,78 @@
 # plugins/tonerType/toner_type_web.py
 from __future__ import annotations
 import logging
-from typing import Any, Dict, Optional
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 from settings.arguments import build_plugin_parser
+from settings.logging_setup import set_step_log_level
 from plugins.base import load_context_from_args, save_context
+from adapters.json_store import JsonStore
 from core.printers import iter_printers, ensure_printer_info, norm_ip, is_good_ip, matches_type
-from adapters.toner_type_web import get_ews_toner_type
+from adapters.toner_type_web import get_ews_toner_type, get_ews_toner_type_batch
 
 LOG = logging.getLogger("toner_type_web")
 
 TARGET_TYPES = {"408dn", "MFP432"}
 TARGET_TYPES_LC = {s.lower() for s in TARGET_TYPES}
+CACHE_TTL = 24 * 3600
+
+def _cache_path(logs_dir: Path) -> Path:
+    return logs_dir / "tonerType" / "cache.json"
+
+def _load_cache(path: Path) -> Dict[str, str]:
+    """Return {Type: tonerType} for entries younger than CACHE_TTL."""
+    try:
+        raw = JsonStore(path).load()
+    except Exception:
+        return {}
+    now = time.time()
+    out: Dict[str, str] = {}
+    for t, ent in (raw.items() if isinstance(raw, dict) else ()):
+        if not isinstance(ent, dict):
+            continue
+        tt = ent.get("tonerType")
+        mtime = ent.get("mtime")
+        if isinstance(tt, str) and tt and isinstance(mtime, (int, float)) and now - mtime < CACHE_TTL:
+            out[t] = tt
+    return out
+
+def _save_cache(path: Path, learned: Dict[str, str]) -> None:
+    store = JsonStore(path)
+    try:
+        raw = store.load()
+        if not isinstance(raw, dict):
+            raw = {}
+    except Exception:
+        raw = {}
+    now = time.time()
+    for t, tt in learned.items():
+        raw[t] = {"tonerType": tt, "mtime": now}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        store.save(raw)
+    except Exception as e:
+        LOG.warning("could not write %s: %s", path, e)
 
 def _process_one(ip: str, *, timeout: Optional[float]) -> str:
     if not is_good_ip(ip):
         return ""
     return get_ews_toner_type(ip, timeout=timeout)
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     ap = build_plugin_parser("Enrich printers.json with toner type via EWS web")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
     ctx, log_cm = load_context_from_args(args, "toner_type_web")
     timeout = args.timeout or ctx.cfg.http_default_timeout
-    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+    set_step_log_level(args.debug)
 
     processed = 0
     selected = 0
     found_only_ip = False
+    cache_path = _cache_path(ctx.cfg.plugin_logs_dir)
+    # --only-ip is the re-probe path: always ask the printer, but still refresh the cache
+    cached_by_type = {} if args.only_ip else _load_cache(cache_path)
+    learned_by_type: Dict[str, str] = {}
 
     with log_cm:
         printers = list(iter_printers(ctx.data))
@@ -38,8 +84,13 @@ def main() -> int:
                     if not matches_type(prn, TARGET_TYPES_LC):
                         continue
                     selected += 1
+                    t = str(prn.get("Type") or "").strip()
                     try:
-                        tid = _process_one(ip, timeout=timeout)
+                        tid = learned_by_type.get(t)
+                        if not tid:
+                            tid = _process_one(ip, timeout=timeout)
+                            if tid:
+                                learned_by_type[t] = tid
                         info = ensure_printer_info(prn)
                         info["tonerType"] = tid or ""
                         processed += 1
@@ -54,6 +105,8 @@ def main() -> int:
                     LOG.warning("[synthetic %s] error: %s", args.only_ip, e)
         else:
             by_type: Dict[str, List[Dict[str, Any]]] = {}
+            rep_ip_by_type: Dict[str, str] = {}
+            preset_by_type: Dict[str, str] = {}
             for prn in printers:
                 ip = norm_ip(prn)
                 if not is_good_ip(ip):
@@ -61,35 +114,47 @@ def main() -> int:
                 if not matches_type(prn, TARGET_TYPES_LC):
                     continue
                 t = str(prn.get("Type") or "").strip()
-                by_type.setdefault(t, []).append(prn)
+                items = by_type.get(t)
+                if items is None:
+                    items = by_type[t] = []
+                    rep_ip_by_type[t] = ip
+                items.append(prn)
+                if t not in preset_by_type:
+                    tt0 = (prn.get("printerInfo") or {}).get("tonerType") or ""
+                    if isinstance(tt0, str) and tt0:
+                        preset_by_type[t] = tt0
+            for t in by_type:
+                if t not in preset_by_type and t in cached_by_type:
+                    preset_by_type[t] = cached_by_type[t]
+            # probe one printer per type concurrently; write back on this thread
+            probe_types = [t for t in by_type if t not in preset_by_type]
+
+            def _on_error(rep_ip: str, e: Exception) -> str:
+                LOG.warning("[%s] error: %s", rep_ip, e)
+                return ""
+
+            probed = get_ews_toner_type_batch([rep_ip_by_type[t] for t in probe_types], timeout=timeout,
+                                              on_error=_on_error)
+            for t in probe_types:
+                preset_by_type[t] = probed.get(rep_ip_by_type[t]) or ""
+                if preset_by_type[t]:
+                    learned_by_type[t] = preset_by_type[t]
             for t, items in by_type.items():
                 selected += len(items)
-                preset = ""
-                for it in items:
-                    pi0 = it.get("printerInfo") or {}
-                    tt0 = pi0.get("tonerType") or ""
-                    if isinstance(tt0, str) and tt0:
-                        preset = tt0
-                        break
-                if not preset:
-                    rep_ip = None
-                    for it in items:
-                        ip = norm_ip(it)
-                        if is_good_ip(ip):
-                            rep_ip = ip
-                            break
-                    if rep_ip:
-                        try:
-                            preset = _process_one(rep_ip, timeout=timeout) or ""
-                        except Exception as e:
-                            LOG.warning("[%s] error: %s", rep_ip, e)
+                preset = preset_by_type.get(t, "")
                 for it in items:
                     info = ensure_printer_info(it)
                     info["tonerType"] = preset
                     processed += 1
         LOG.info("toner_type_web: selected=%s processed=%s", selected, processed)
+        if learned_by_type:
+            _save_cache(cache_path, learned_by_type)
     save_context(ctx)
     return 0
 
+def run(argv: List[str]) -> int:
+    """In-process entry used by the pipeline's script runner."""
+    return main(argv)
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -1,12 +1,34 @@
 # settings/logging_setup.py
 from __future__ import annotations
+import atexit
 import logging
 import platform
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 from pathlib import Path
 from contextlib import contextmanager
 
+_cli_listener: QueueListener | None = None
+
+
+def _queued_file_handler(logfile: Path) -> tuple[QueueHandler, QueueListener]:
+    """
+    Loggers only enqueue; a background listener thread does the file writes,
+    so worker threads don't serialize on the FileHandler lock.
+    """
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(q, logging.FileHandler(logfile, encoding="utf-8"))
+    listener.start()
+    return QueueHandler(q), listener
+
+
+def _stop_listener(listener: QueueListener) -> None:
+    listener.stop()
+    for h in listener.handlers:
+        h.close()
+
 
 def setup_logging(log_dir: Path, enable_logs: bool) -> Path | None:
     if not enable_logs:
@@ -16,12 +38,20 @@ def setup_logging(log_dir: Path, enable_logs: bool) -> Path | None:
     logfile = log_dir / f"{ts}.log"
     fmt = "%(asctime)s [%(levelname)s] %(message)s"
     datefmt = "%Y-%m-%d %H:%M:%S"
+    global _cli_listener
+    handler, listener = _queued_file_handler(logfile)
     logging.basicConfig(
         level=logging.INFO,
         format=fmt,
         datefmt=datefmt,
-        handlers=[logging.FileHandler(logfile, encoding="utf-8")],
+        handlers=[handler],
     )
+    if handler in logging.getLogger().handlers:
+        _cli_listener = listener
+        atexit.register(_stop_listener, listener)
+    else:
+        # root was already configured; basicConfig ignored our handler
+        _stop_listener(listener)
     logging.info("=== Printer ETL start ===")
     logging.info("Python exe : %s", sys.executable)
     logging.info("Python ver : %s", sys.version.replace("\n", " "))
@@ -29,6 +59,17 @@ def setup_logging(log_dir: Path, enable_logs: bool) -> Path | None:
     return logfile
 
 
+def set_step_log_level(debug: bool) -> None:
+    """
+    Apply a step's --debug. Steps run inside the CLI process, where root already
+    has handlers and basicConfig() alone would ignore the level; the script
+    runner restores the previous level when the step returns.
+    """
+    level = logging.DEBUG if debug else logging.INFO
+    logging.basicConfig(level=level)
+    logging.getLogger().setLevel(level)
+
+
 def flog(msg: str, level: int = logging.INFO) -> None:
     if logging.getLogger().handlers:
         logging.log(level, msg)
@@ -42,6 +83,10 @@ def cli_logging(log_dir: Path, enable_logs: bool):
     finally:
         if enable_logs and logfile is not None:
             flog(f"Log saved to: {logfile}")
+            if _cli_listener is not None:
+                # drain the queue so the log is complete when we return
+                _cli_listener.stop()
+                _cli_listener.start()
 
 
 # 👇 updated to always add and remove a dedicated file handler for the plugin
@@ -58,7 +103,7 @@ def plugin_logging(log_dir: Path, plugin_name: str, enable_logs: bool = True):
 
     fmt = "%(asctime)s [%(levelname)s] %(message)s"
     datefmt = "%Y-%m-%d %H:%M:%S"
-    handler = logging.FileHandler(logfile, encoding="utf-8")
+    handler, listener = _queued_file_handler(logfile)
     handler.setFormatter(logging.Formatter(fmt=fmt, datefmt=datefmt))
 
     root = logging.getLogger()
@@ -71,4 +116,4 @@ def plugin_logging(log_dir: Path, plugin_name: str, enable_logs: bool = True):
     finally:
         flog(f"[{plugin_name}] log saved to: {logfile}")
         root.removeHandler(handler)
-        handler.close()
+        _stop_listener(listener)